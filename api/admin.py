@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
 
-from .models import KoboSubmission
+from .answers import replace_answers
+from .models import FormSchema, KoboSubmission, SyncCheckpoint, SyncJob, SyncRun
+from .schemas import get_schema, submission_version
+from .services.sync import build_derived_fields
 
 
 @admin.register(KoboSubmission)
@@ -14,7 +18,7 @@ class KoboSubmissionAdmin(admin.ModelAdmin):
         "date_synced",
     ]
     list_filter = ["form_uid", "date_submitted", "date_synced"]
-    search_fields = ["uuid", "form_uid", "data"]
+    search_fields = ["uuid", "form_uid", "search_text"]
     readonly_fields = ["uuid", "date_synced", "date_updated"]
     ordering = ["-date_submitted"]
     date_hierarchy = "date_submitted"
@@ -50,3 +54,96 @@ class KoboSubmissionAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         """Disable manual creation in admin (synced from Kobo only)."""
         return False
+
+    def save_model(self, request, obj, form, change):
+        """Recompute the columns and answers derived from data, as syncs do."""
+        schema = get_schema(obj.form_uid, submission_version(obj.data))
+        for name, value in build_derived_fields(obj.data, schema).items():
+            setattr(obj, name, value)
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            replace_answers([(obj.pk, obj.form_uid, obj.data)])
+
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    """Admin interface for per-form incremental sync checkpoints."""
+
+    list_display = [
+        "form_uid",
+        "last_submission_id",
+        "last_submission_time",
+        "date_updated",
+    ]
+    search_fields = ["form_uid"]
+    readonly_fields = ["date_updated"]
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    """Admin interface for background sync jobs."""
+
+    list_display = [
+        "id",
+        "form_uid",
+        "status",
+        "processed",
+        "total",
+        "date_created",
+        "date_finished",
+    ]
+    list_filter = ["status", "form_uid"]
+    readonly_fields = [
+        "total",
+        "processed",
+        "created",
+        "updated",
+        "unchanged",
+        "skipped",
+        "error",
+        "worker",
+        "date_created",
+        "date_started",
+        "date_heartbeat",
+        "date_finished",
+    ]
+    ordering = ["-date_created"]
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    """Admin interface for page-checkpointed fetch_kobo_data runs."""
+
+    list_display = [
+        "id",
+        "form_uid",
+        "status",
+        "pages_committed",
+        "last_submission_id",
+        "date_started",
+        "date_finished",
+    ]
+    list_filter = ["status", "form_uid"]
+    readonly_fields = [
+        "query",
+        "last_submission_id",
+        "pages_committed",
+        "created",
+        "updated",
+        "unchanged",
+        "skipped",
+        "error",
+        "date_started",
+        "date_finished",
+    ]
+    ordering = ["-date_started"]
+
+
+@admin.register(FormSchema)
+class FormSchemaAdmin(admin.ModelAdmin):
+    """Admin interface for form schemas stored by fetch_kobo_data."""
+
+    list_display = ["form_uid", "version_id", "name", "date_fetched"]
+    list_filter = ["form_uid"]
+    search_fields = ["form_uid", "version_id", "name"]
+    readonly_fields = ["form_uid", "version_id", "name", "questions", "date_fetched"]
@@ -0,0 +1,141 @@
+"""
+Flattened, typed answers for indexed filtering.
+
+Every write of a KoboSubmission rewrites its SubmissionAnswer rows, one per
+answer (Kobo metadata is skipped, as for search). Answers inside repeat
+groups are stored under their own question path, so a repeat contributes
+one row per entry. Values are typed the same way on write and in filters
+(``parse_number`` / ``parse_date_value``), so ``?data.age__gte=18`` compares
+numbers and ``?data.visit_date__lt=2025-01-01`` compares dates. When the
+form's schema is stored, question types decide instead: text and select
+answers such as phone numbers are never cast, numbers never read as dates.
+"""
+
+import math
+from datetime import datetime, time, timezone as dt_timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import SubmissionAnswer
+from .schemas import Schema, schema_lookup
+from .search import is_metadata_key
+
+ANSWER_BATCH_SIZE = 1000
+
+VALUE_TEXT_LENGTH = SubmissionAnswer._meta.get_field("value_text").max_length
+FIELD_PATH_LENGTH = SubmissionAnswer._meta.get_field("field_path").max_length
+
+
+def _flatten(path: str, value: Any) -> Iterator[Tuple[str, Any]]:
+    if value is None or value == "":
+        return
+    if isinstance(value, dict):
+        # Repeat entries carry full question paths as their keys.
+        for key, item in value.items():
+            if not is_metadata_key(key):
+                yield from _flatten(key, item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(path, item)
+    else:
+        yield path, value
+
+
+def iter_answers(data: Any) -> Iterator[Tuple[str, Any]]:
+    """(question path, scalar value) pairs of a submission's answers."""
+    if not isinstance(data, dict):
+        return
+    for key, value in data.items():
+        if not is_metadata_key(key):
+            yield from _flatten(key, value)
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """The value as a finite float, or None (Kobo sends numbers as strings)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        try:
+            number = float(str(value).strip())
+        except ValueError:
+            return None
+    return number if math.isfinite(number) else None
+
+
+def parse_date_value(value: Any) -> Optional[datetime]:
+    """An ISO date or datetime string as an aware datetime, or None."""
+    if not isinstance(value, str) or len(value) < 10:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = parsed.replace(tzinfo=dt_timezone.utc)
+    return parsed
+
+
+def _typed_values(
+    value: Any, kind: Optional[str]
+) -> Tuple[Optional[float], Optional[datetime]]:
+    if kind == "text":
+        return None, None
+    number = parse_number(value) if kind in (None, "number") else None
+    moment = parse_date_value(value) if kind in (None, "date") else None
+    return number, moment
+
+
+def build_answers(
+    submission_id: int,
+    form_uid: str,
+    data: Dict[str, Any],
+    schema: Optional[Schema] = None,
+) -> List[SubmissionAnswer]:
+    """Unsaved SubmissionAnswer rows for one submission."""
+    rows = []
+    for path, value in iter_answers(data):
+        kind = schema.value_kind(path) if schema is not None else None
+        number, moment = _typed_values(value, kind)
+        rows.append(
+            SubmissionAnswer(
+                submission_id=submission_id,
+                form_uid=form_uid,
+                field_path=path[:FIELD_PATH_LENGTH],
+                value_text=str(value)[:VALUE_TEXT_LENGTH],
+                value_num=number,
+                value_date=moment,
+            )
+        )
+    return rows
+
+
+def replace_answers(submissions: Iterable[Tuple[int, str, Dict[str, Any]]]) -> int:
+    """
+    Rewrite the answer rows of (submission id, form UID, data) triples.
+
+    Call it in the same transaction as the submission write, so answers never
+    disagree with ``data``.
+
+    Returns:
+        Number of answer rows written
+    """
+    ids = []
+    rows: List[SubmissionAnswer] = []
+    schema_for = schema_lookup()
+    for submission_id, form_uid, data in submissions:
+        ids.append(submission_id)
+        rows.extend(build_answers(submission_id, form_uid, data, schema_for(form_uid, data)))
+    if not ids:
+        return 0
+    SubmissionAnswer.objects.filter(submission_id__in=ids).delete()
+    SubmissionAnswer.objects.bulk_create(rows, batch_size=ANSWER_BATCH_SIZE)
+    return len(rows)
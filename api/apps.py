@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from .json_indexes import clear_column_cache
+        from .models import KoboSubmission
+        from .page_cache import invalidate_submission
+
+        # Migrations may add or drop generated JSON columns.
+        post_migrate.connect(clear_column_cache, dispatch_uid="api_json_index_columns")
+
+        # Single-row writes (webhook, admin) invalidate cached submission
+        # pages; the bulk upsert invalidates explicitly, as it sends no signals.
+        post_save.connect(
+            invalidate_submission, sender=KoboSubmission, dispatch_uid="api_submission_saved"
+        )
+        post_delete.connect(
+            invalidate_submission, sender=KoboSubmission, dispatch_uid="api_submission_deleted"
+        )
@@ -0,0 +1,85 @@
+"""
+Display projection of submissions for the web pages.
+
+Every write precomputes, next to ``data``:
+
+- ``display_fields``: the answers shown on the detail page, as label/value
+  pairs in answer order, with Kobo metadata (``_uuid``, ``formhub/``,
+  ``meta/``, start/end) removed;
+- ``preview``: the first few non-empty answers for the submission cards,
+  already truncated.
+
+Labels and choice labels come from the form schema when one is stored, so
+the templates only loop over precomputed values.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from django.utils.text import Truncator
+
+from .schemas import Schema
+from .search import is_metadata_key
+
+PREVIEW_ANSWERS = 2
+PREVIEW_LABEL_WORDS = 3
+PREVIEW_VALUE_WORDS = 6
+PREVIEW_LIST_ITEMS = 4
+
+
+def field_label(key: str, schema: Optional[Schema] = None) -> str:
+    """The question label, else the key made readable ('first_name' -> 'First Name')."""
+    label = schema.label(key) if schema else None
+    return label or str(key).replace("_", " ").title()
+
+
+def display_value(key: str, value: Any, schema: Optional[Schema] = None) -> Any:
+    """The answer with select choices replaced by their labels."""
+    question = schema.questions.get(key) if schema else None
+    if question is None or not question.choices or not isinstance(value, str):
+        return value
+    if question.type == "select_multiple":
+        return [question.choices.get(item, item) for item in value.split()]
+    return question.choices.get(value, value)
+
+
+def build_display_fields(
+    payload: Dict[str, Any], schema: Optional[Schema] = None
+) -> List[Dict[str, Any]]:
+    """Label/value pairs of a submission's answers, metadata removed."""
+    if not isinstance(payload, dict):
+        return []
+    return [
+        {"label": field_label(key, schema), "value": display_value(key, value, schema)}
+        for key, value in payload.items()
+        if not is_metadata_key(key)
+    ]
+
+
+def build_preview(display_fields: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """The first PREVIEW_ANSWERS non-empty answers, truncated for a card."""
+    preview = []
+    for field in display_fields:
+        value = field["value"]
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, (list, tuple)):
+            # Cut whole items, so the text never ends on a dangling comma.
+            text = ", ".join(str(item) for item in value[:PREVIEW_LIST_ITEMS])
+            if len(value) > PREVIEW_LIST_ITEMS:
+                text += "…"
+        else:
+            text = Truncator(str(value)).words(PREVIEW_VALUE_WORDS)
+        preview.append(
+            {"label": Truncator(field["label"]).words(PREVIEW_LABEL_WORDS), "value": text}
+        )
+        if len(preview) == PREVIEW_ANSWERS:
+            break
+    return preview
+
+
+def build_display(
+    payload: Dict[str, Any], schema: Optional[Schema] = None
+) -> Dict[str, Any]:
+    """Values of the ``display_fields`` and ``preview`` columns."""
+    display_fields = build_display_fields(payload, schema)
+    return {"display_fields": display_fields, "preview": build_preview(display_fields)}
@@ -0,0 +1,123 @@
+"""
+Streaming exports of stored submissions.
+
+Rows are read in primary-key chunks and written to the response as they
+are produced, so memory stays flat however many submissions are exported.
+"""
+
+import csv
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import KoboSubmission
+from .schemas import get_schema
+from .search import is_metadata_key
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Submission columns written ahead of the flattened answers.
+BASE_COLUMNS = ["id", "uuid", "form_uid", "date_submitted", "date_updated"]
+
+
+def iter_submissions(
+    queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[KoboSubmission]:
+    """
+    Yield submissions in primary-key order, one chunk query at a time.
+
+    QuerySet.iterator() cannot stream on MySQL (mysqlclient buffers the
+    whole result client-side), so walk the primary key instead.
+    """
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_pk = chunk[-1].pk
+
+
+def _row_dict(submission: KoboSubmission) -> Dict[str, Any]:
+    return {
+        "id": submission.pk,
+        "uuid": submission.uuid,
+        "form_uid": submission.form_uid,
+        "date_submitted": submission.date_submitted,
+        "date_updated": submission.date_updated,
+        "data": submission.data,
+    }
+
+
+def iter_ndjson(queryset: QuerySet) -> Iterator[str]:
+    """One JSON object per line for each submission."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for submission in iter_submissions(queryset):
+        yield encoder.encode(_row_dict(submission)) + "\n"
+
+
+def export_fields(form_uid: Optional[str], queryset: QuerySet) -> List[str]:
+    """
+    Answer columns for a CSV export.
+
+    Uses settings.KOBO_EXPORT_FIELDS[form_uid] when configured, then the
+    questions of the form's stored schema, in form order. Otherwise the
+    answer keys found in the first chunk of rows, in first-seen order.
+    """
+    configured = getattr(settings, "KOBO_EXPORT_FIELDS", {})
+    if form_uid and configured.get(form_uid):
+        return list(configured[form_uid])
+    schema = get_schema(form_uid) if form_uid else None
+    if schema is not None and schema.columns:
+        return schema.columns
+
+    fields: Dict[str, None] = {}
+    for data in queryset.order_by("pk").values_list("data", flat=True)[
+        :EXPORT_CHUNK_SIZE
+    ]:
+        if isinstance(data, dict):
+            for key in data:
+                if not is_metadata_key(key):
+                    fields.setdefault(key)
+    return list(fields)
+
+
+def flatten_value(value: Any) -> str:
+    """Render an answer as a single CSV cell."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return " ".join(str(item) for item in value)
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset: QuerySet, fields: List[str]) -> Iterator[str]:
+    """CSV header plus one row per submission with answers flattened into columns."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(BASE_COLUMNS + fields)
+    for submission in iter_submissions(queryset):
+        data = submission.data if isinstance(submission.data, dict) else {}
+        yield writer.writerow(
+            [
+                submission.pk,
+                submission.uuid,
+                submission.form_uid,
+                submission.date_submitted.isoformat(),
+                submission.date_updated.isoformat(),
+            ]
+            + [flatten_value(data.get(field)) for field in fields]
+        )
@@ -0,0 +1,107 @@
+"""
+Fast JSON encoding and decoding.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise, so the rest of the code base can call ``loads``/``dumps`` without
+caring which backend is active. Covers Kobo API responses, DRF request
+parsing and response rendering (see FastJSONParser and FastJSONRenderer).
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson returns datetimes in its own format; let DRF's encoder render them
+# so output stays identical to the stock JSONRenderer ("...Z" for UTC).
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if orjson is not None
+    else 0
+)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode JSON from bytes or str.
+
+    Raises:
+        ValueError: ``data`` is not valid JSON (both backends raise a
+            json.JSONDecodeError subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Encode ``obj`` as compact UTF-8 JSON bytes.
+
+    ``default`` is called for objects the backend cannot serialize natively
+    (datetimes included), and should return a serializable value.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, default=default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer backed by ``dumps``.
+
+    Indented output (``Accept: application/json; indent=4``) and non-default
+    JSON settings go through the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context)
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = encoders.JSONEncoder()
+        ret = dumps(data, default=encoder.default)
+        # Same escaping as JSONRenderer: these are valid JSON but break
+        # JavaScript string literals.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by ``loads``."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace("-", "") != "utf8":
+                body = body.decode(encoding)
+            return loads(body)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
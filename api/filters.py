@@ -0,0 +1,109 @@
+"""
+Answer filters for the submissions API.
+
+``?data.<question path>=<value>`` keeps submissions with a matching answer.
+Append ``__gt``, ``__gte``, ``__lt`` or ``__lte`` for range filters, which
+compare numbers or dates, or ``__in`` for a comma-separated list. Examples:
+``?data.group_location/district=Sylhet`` and ``?data.respondent_age__gte=18``.
+
+Paths registered in KOBO_JSON_INDEXES whose generated column exists are
+filtered on that column (see json_indexes.py). Every other filter becomes a
+semi-join on SubmissionAnswer, served by its (form_uid, field_path, value)
+indexes; add ``?form_uid=`` so the index can be used in full.
+"""
+
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from django.db.models import QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .answers import VALUE_TEXT_LENGTH, parse_date_value, parse_number
+from .json_indexes import filter_on_column, indexed_column
+from .models import SubmissionAnswer
+
+ANSWER_PARAM_PREFIX = "data."
+
+RANGE_LOOKUPS = ("gt", "gte", "lt", "lte")
+LOOKUPS = RANGE_LOOKUPS + ("in",)
+
+
+def split_lookup(name: str) -> Tuple[str, str]:
+    """Split ``district__in`` into ("district", "in"); no suffix means exact."""
+    path, separator, lookup = name.rpartition("__")
+    if separator and lookup in LOOKUPS:
+        return path, lookup
+    return name, "exact"
+
+
+def answer_condition(lookup: str, value: str) -> Dict[str, Any]:
+    """
+    SubmissionAnswer filter kwargs for one lookup and raw query value.
+
+    Raises:
+        ValueError: a range lookup got a value that is neither a number
+            nor a date
+    """
+    if lookup == "exact":
+        return {"value_text": value[:VALUE_TEXT_LENGTH]}
+    if lookup == "in":
+        values = [item.strip()[:VALUE_TEXT_LENGTH] for item in value.split(",")]
+        return {"value_text__in": [item for item in values if item]}
+
+    number = parse_number(value)
+    if number is not None:
+        return {f"value_num__{lookup}": number}
+    moment = parse_date_value(value)
+    if moment is not None:
+        return {f"value_date__{lookup}": moment}
+    raise ValueError("expected a number or an ISO date")
+
+
+def answer_filter_params(params: Mapping[str, str]) -> Dict[str, str]:
+    """The ``data.`` answer filters among request parameters."""
+    return {
+        param: value
+        for param, value in params.items()
+        if param.startswith(ANSWER_PARAM_PREFIX)
+    }
+
+
+def apply_answer_filters(
+    queryset: QuerySet, params: Mapping[str, str], form_uid: Optional[str] = None
+) -> QuerySet:
+    """
+    Apply every ``data.`` filter in ``params`` to a KoboSubmission queryset.
+
+    Raises:
+        ValidationError: a filter has no path or an unusable value
+    """
+    for param, value in answer_filter_params(params).items():
+        path, lookup = split_lookup(param[len(ANSWER_PARAM_PREFIX) :])
+        if not path:
+            raise ValidationError({param: "Missing question path"})
+
+        index = indexed_column(path)
+        if index is not None:
+            filtered = filter_on_column(queryset, index, lookup, value)
+            if filtered is not None:
+                queryset = filtered
+                continue
+
+        try:
+            condition = answer_condition(lookup, value)
+        except ValueError as exc:
+            raise ValidationError({param: str(exc)})
+        answers = SubmissionAnswer.objects.filter(field_path=path, **condition)
+        if form_uid:
+            answers = answers.filter(form_uid=form_uid)
+        queryset = queryset.filter(pk__in=answers.values("submission_id"))
+    return queryset
+
+
+class AnswerFilterBackend(BaseFilterBackend):
+    """Applies ``?data.<path>[__lookup]=`` filters (see module docstring)."""
+
+    def filter_queryset(self, request, queryset, view):
+        return apply_answer_filters(
+            queryset, request.query_params, request.query_params.get("form_uid")
+        )
@@ -0,0 +1,221 @@
+"""
+Generated columns for hot JSON answer paths.
+
+Answers listed in settings.KOBO_JSON_INDEXES get a stored generated column
+on api_kobosubmission, extracted from ``data``, with a secondary index.
+Run ``manage.py make_json_index_migration`` to write the migration after
+changing the registry. MySQL only; other databases keep using the
+SubmissionAnswer table.
+
+Once a column exists, answer filters on its path (``?data.<path>=`` in the
+API and on the submissions page) query the column instead of joining
+SubmissionAnswer. Ordering (``?ordering=``) does not use the columns.
+Which columns exist is read from the database and cached per process for
+JSON_INDEX_COLUMNS_TTL seconds. The process running ``migrate`` forgets
+its copy right away; other processes (web workers, sync workers) pick the
+new columns up when their copy expires.
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import CharField, DecimalField, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .answers import parse_date_value, parse_number
+from .models import KoboSubmission
+
+TEXT = "text"
+NUMBER = "number"
+TYPES = (TEXT, NUMBER)
+
+COLUMN_PREFIX = "jx_"
+TEXT_LENGTH = 255
+NUMBER_DIGITS, NUMBER_DECIMALS = 28, 10
+
+# XLSForm names, joined by "/" for groups; nothing that needs SQL quoting.
+_PATH_RE = re.compile(r"^[A-Za-z_][\w.\-]*(/[A-Za-z_][\w.\-]*)*$")
+
+
+@dataclass(frozen=True)
+class JsonIndex:
+    """One registered answer path and its generated column."""
+
+    path: str
+    type: str
+
+    @property
+    def column(self) -> str:
+        slug = re.sub(r"[^a-z0-9]+", "_", self.path.lower()).strip("_")
+        digest = hashlib.md5(self.path.encode()).hexdigest()[:6]
+        return f"{COLUMN_PREFIX}{slug[:48]}_{digest}"
+
+    @property
+    def index_name(self) -> str:
+        return f"{self.column}_idx"
+
+    @property
+    def column_type(self) -> str:
+        if self.type == NUMBER:
+            return f"DECIMAL({NUMBER_DIGITS},{NUMBER_DECIMALS})"
+        return f"VARCHAR({TEXT_LENGTH})"
+
+    @property
+    def expression(self) -> str:
+        """MySQL expression the column is generated from."""
+        value = f"JSON_UNQUOTE(JSON_EXTRACT(`data`, '$.\"{self.path}\"'))"
+        if self.type == NUMBER:
+            # Only cast strings that fit the column, so writes never fail.
+            integer_digits = NUMBER_DIGITS - NUMBER_DECIMALS
+            pattern = f"^-?[0-9]{{1,{integer_digits}}}([.][0-9]{{1,{NUMBER_DECIMALS}}})?$"
+            return (
+                f"CASE WHEN {value} REGEXP '{pattern}' "
+                f"THEN CAST({value} AS {self.column_type}) END"
+            )
+        return f"LEFT({value}, {TEXT_LENGTH})"
+
+
+def registered_indexes() -> Dict[str, JsonIndex]:
+    """
+    Every path in settings.KOBO_JSON_INDEXES, across forms.
+
+    The setting maps form UIDs to ``{path: "text" | "number"}``. Columns are
+    shared by all forms, so a path must have the same type everywhere.
+
+    Raises:
+        ImproperlyConfigured: an invalid path or type, or conflicting types
+    """
+    indexes: Dict[str, JsonIndex] = {}
+    for form_uid, paths in getattr(settings, "KOBO_JSON_INDEXES", {}).items():
+        for path, kind in paths.items():
+            if not _PATH_RE.match(path):
+                raise ImproperlyConfigured(
+                    f"KOBO_JSON_INDEXES[{form_uid!r}]: invalid path {path!r}"
+                )
+            if kind not in TYPES:
+                raise ImproperlyConfigured(
+                    f"KOBO_JSON_INDEXES[{form_uid!r}][{path!r}]: type must be one of {TYPES}"
+                )
+            if path in indexes and indexes[path].type != kind:
+                raise ImproperlyConfigured(
+                    f"KOBO_JSON_INDEXES: {path!r} is registered as both "
+                    f"{indexes[path].type!r} and {kind!r}"
+                )
+            indexes[path] = JsonIndex(path, kind)
+    return indexes
+
+
+def diff_indexes(
+    state: Mapping[str, str], indexes: Mapping[str, JsonIndex]
+) -> Tuple[List[JsonIndex], List[JsonIndex]]:
+    """
+    Columns to add and drop to go from a migrated state to the registry.
+
+    ``state`` maps paths to types, as stored on json index migrations. A path
+    whose type changed is dropped and added again.
+    """
+    previous = {path: JsonIndex(path, kind) for path, kind in state.items()}
+    add = [index for path, index in sorted(indexes.items()) if previous.get(path) != index]
+    drop = [index for path, index in sorted(previous.items()) if indexes.get(path) != index]
+    return add, drop
+
+
+# (monotonic time read, columns) of the last database lookup
+_column_cache: Optional[Tuple[float, FrozenSet[str]]] = None
+
+
+def column_cache_ttl() -> int:
+    """Seconds the existing columns are cached (JSON_INDEX_COLUMNS_TTL)."""
+    return getattr(settings, "JSON_INDEX_COLUMNS_TTL", 300)
+
+
+def _read_columns() -> FrozenSet[str]:
+    if connection.vendor != "mysql":
+        return frozenset()
+    table = KoboSubmission._meta.db_table
+    with connection.cursor() as cursor:
+        description = connection.introspection.get_table_description(cursor, table)
+    return frozenset(
+        column.name for column in description if column.name.startswith(COLUMN_PREFIX)
+    )
+
+
+def existing_columns() -> FrozenSet[str]:
+    """Generated JSON columns present on the submissions table (cached)."""
+    global _column_cache
+    now = time.monotonic()
+    if _column_cache is None or now - _column_cache[0] >= column_cache_ttl():
+        _column_cache = (now, _read_columns())
+    return _column_cache[1]
+
+
+def clear_column_cache(**kwargs) -> None:
+    """Forget the cached columns (connected to post_migrate)."""
+    global _column_cache
+    _column_cache = None
+
+
+def indexed_column(path: str) -> Optional[JsonIndex]:
+    """The registered index for ``path`` if its column exists, else None."""
+    index = registered_indexes().get(path)
+    if index is None or index.column not in existing_columns():
+        return None
+    return index
+
+
+def _column_value(index: JsonIndex, lookup: str, value: str) -> Optional[Any]:
+    if index.type == NUMBER:
+        items = value.split(",") if lookup == "in" else [value]
+        numbers = [parse_number(item) for item in items if item.strip()]
+        if not numbers or None in numbers:
+            return None
+        decimals = [Decimal(str(number)) for number in numbers]
+        return decimals if lookup == "in" else decimals[0]
+
+    if lookup == "in":
+        return [item.strip()[:TEXT_LENGTH] for item in value.split(",") if item.strip()]
+    if lookup == "exact":
+        return value[:TEXT_LENGTH]
+    # Text columns only order correctly for ISO dates, not for numbers.
+    return value if parse_date_value(value) is not None else None
+
+
+def filter_on_column(
+    queryset: QuerySet, index: JsonIndex, lookup: str, value: str
+) -> Optional[QuerySet]:
+    """
+    Apply one answer filter to the generated column.
+
+    Returns None when the column cannot answer this lookup and value (for
+    example a numeric range on a text column), so the caller falls back to
+    SubmissionAnswer.
+    """
+    converted = _column_value(index, lookup, value)
+    if converted is None:
+        return None
+    if index.type == NUMBER:
+        output_field = DecimalField(
+            max_digits=NUMBER_DIGITS, decimal_places=NUMBER_DECIMALS
+        )
+    else:
+        output_field = CharField(max_length=TEXT_LENGTH)
+    table = connection.ops.quote_name(KoboSubmission._meta.db_table)
+    alias = f"_{index.column}"
+    queryset = queryset.annotate(
+        **{
+            alias: RawSQL(
+                f"{table}.{connection.ops.quote_name(index.column)}",
+                (),
+                output_field=output_field,
+            )
+        }
+    )
+    suffix = "" if lookup == "exact" else f"__{lookup}"
+    return queryset.filter(**{f"{alias}{suffix}": converted})
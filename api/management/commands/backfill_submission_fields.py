@@ -0,0 +1,75 @@
+"""
+Django management command to recompute the columns derived from submission data.
+
+Needed after upgrading, for rows stored before a derived column (such as
+search_text or the card preview) or the SubmissionAnswer table existed, and
+to pick up question labels after a form schema is first stored. New writes
+fill both automatically.
+
+Usage:
+    python manage.py backfill_submission_fields
+    python manage.py backfill_submission_fields --form-uid <form_uid>
+    python manage.py backfill_submission_fields --batch-size 2000
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.answers import replace_answers
+from api.models import KoboSubmission
+from api.page_cache import invalidate_forms, invalidate_fragments
+from api.schemas import schema_lookup
+from api.services.sync import DEFAULT_BATCH_SIZE, DERIVED_FIELDS, build_derived_fields
+
+
+class Command(BaseCommand):
+    help = "Recompute derived columns (e.g. search_text) and answer rows for stored submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--form-uid",
+            type=str,
+            default=None,
+            help="Only backfill submissions of this form",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Rows rewritten per batch (default: {DEFAULT_BATCH_SIZE})",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options.get("batch_size") or DEFAULT_BATCH_SIZE
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        queryset = KoboSubmission.objects.only(
+            "id", "form_uid", "data", "date_updated"
+        ).order_by("pk")
+        if options.get("form_uid"):
+            queryset = queryset.filter(form_uid=options["form_uid"])
+
+        # Walk the table by primary key so each batch is an index range scan.
+        updated = 0
+        last_pk = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not rows:
+                break
+            schema_for = schema_lookup()
+            for row in rows:
+                schema = schema_for(row.form_uid, row.data)
+                for name, value in build_derived_fields(row.data, schema).items():
+                    setattr(row, name, value)
+            with transaction.atomic():
+                KoboSubmission.objects.bulk_update(rows, DERIVED_FIELDS)
+                replace_answers((row.pk, row.form_uid, row.data) for row in rows)
+                # bulk_update keeps date_updated, so drop the cached pages.
+                invalidate_forms({row.form_uid for row in rows})
+            invalidate_fragments(rows)
+            updated += len(rows)
+            last_pk = rows[-1].pk
+            self.stdout.write(f"Backfilled {updated} submissions...")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} submissions backfilled"))
@@ -0,0 +1,136 @@
+"""
+Django management command comparing the fast JSON backend with the stdlib.
+
+Builds a Kobo-style data endpoint page (nested groups, repeats, attachments,
+geolocation, notes) and times decoding it, as the client does, and encoding
+it, as the API renderer does.
+
+Usage:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --submissions 1000 --iterations 50
+"""
+
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import fastjson
+
+
+def sample_submission(index):
+    """One submission shaped like a real Kobo payload."""
+    submitted = datetime(2025, 10, 7, tzinfo=timezone.utc) + timedelta(minutes=index)
+    submission_uuid = str(uuid.uuid5(uuid.NAMESPACE_URL, f"submission-{index}"))
+    return {
+        "_id": 100000 + index,
+        "_uuid": submission_uuid,
+        "formhub/uuid": "5f1c2e0b8a3d4c6e9f7a1b2c3d4e5f60",
+        "meta/instanceID": f"uuid:{submission_uuid}",
+        "_submission_time": submitted.strftime("%Y-%m-%dT%H:%M:%S"),
+        "_xform_id_string": "aXkq7pQ2rTn9vBwZ",
+        "_status": "submitted_via_web",
+        "_submitted_by": "enumerator_07",
+        "_version_": "vQz3kLm8Np2",
+        "start": submitted.isoformat(),
+        "end": (submitted + timedelta(minutes=12)).isoformat(),
+        "respondent_name": f"Respondent {index}",
+        "respondent_age": str(18 + index % 60),
+        "consent": "yes",
+        "group_location/district": "Sylhet",
+        "group_location/upazila": "Companiganj",
+        "group_location/village": f"Village {index % 40}",
+        "group_household/members": str(2 + index % 7),
+        "group_household/water_source": "tube_well deep_tube_well",
+        "group_household/notes": "Household interviewed at home; "
+        "the head of household was present for the full interview.",
+        "household_members": [
+            {
+                "household_members/name": f"Member {index}-{member}",
+                "household_members/age": str(5 + member * 9),
+                "household_members/occupation": "farmer",
+            }
+            for member in range(3)
+        ],
+        "_geolocation": [24.8949 + index * 1e-5, 91.8687 - index * 1e-5],
+        "_attachments": [
+            {
+                "id": 500000 + index,
+                "mimetype": "image/jpeg",
+                "filename": f"enumerator_07/attachments/{submission_uuid}/photo.jpg",
+                "instance": 100000 + index,
+                "xform": 4242,
+                "download_url": f"https://kf.kobotoolbox.org/api/v2/assets/aXkq7pQ2rTn9vBwZ/data/{100000 + index}/attachments/{500000 + index}/",
+            }
+        ],
+        "_validation_status": {
+            "uid": "validation_status_approved",
+            "label": "Approved",
+            "by_whom": "supervisor_02",
+            "timestamp": 1759838400 + index,
+        },
+        "_notes": [],
+        "_tags": ["round-2"],
+    }
+
+
+def sample_page(size):
+    """A data endpoint response with ``size`` submissions."""
+    return {
+        "count": size,
+        "next": None,
+        "previous": None,
+        "results": [sample_submission(index) for index in range(size)],
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark the fast JSON backend against the stdlib json module"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--submissions",
+            type=int,
+            default=1000,
+            help="Submissions per benchmark page (default: 1000)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Times each operation is repeated (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        size = options.get("submissions")
+        iterations = options.get("iterations")
+        if size < 1 or iterations < 1:
+            raise CommandError("--submissions and --iterations must be positive integers")
+
+        page = sample_page(size)
+        body = json.dumps(page).encode("utf-8")
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Backend: {fastjson.BACKEND}; page of {size} submissions, "
+                f"{len(body) / 1024:.0f} KiB, {iterations} iterations"
+            )
+        )
+
+        cases = [
+            ("decode", lambda: json.loads(body), lambda: fastjson.loads(body)),
+            (
+                "encode",
+                lambda: json.dumps(page, ensure_ascii=False).encode("utf-8"),
+                lambda: fastjson.dumps(page),
+            ),
+        ]
+        for name, stdlib, fast in cases:
+            stdlib_seconds = timeit.timeit(stdlib, number=iterations) / iterations
+            fast_seconds = timeit.timeit(fast, number=iterations) / iterations
+            self.stdout.write(
+                f"{name}: stdlib {stdlib_seconds * 1000:.2f} ms, "
+                f"{fastjson.BACKEND} {fast_seconds * 1000:.2f} ms "
+                f"({stdlib_seconds / fast_seconds:.1f}x)"
+            )
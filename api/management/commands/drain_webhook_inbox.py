@@ -0,0 +1,74 @@
+"""
+Django management command that writes queued webhook payloads to the database.
+
+Only needed when KOBO_WEBHOOK_MODE=queued.
+
+Usage:
+    python manage.py drain_webhook_inbox
+    python manage.py drain_webhook_inbox --once
+    python manage.py drain_webhook_inbox --batch-size 2000 --poll-interval 0.5
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from api.services.inbox import DEFAULT_DRAIN_BATCH_SIZE, drain_inbox
+
+
+class Command(BaseCommand):
+    help = "Write queued KoboToolbox webhook payloads as submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the inbox until it is empty, then exit",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_DRAIN_BATCH_SIZE,
+            help=f"Inbox entries written per batch (default: {DEFAULT_DRAIN_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the inbox is empty (default: 1)",
+        )
+
+    def handle(self, *args, **options):
+        once = options.get("once", False)
+        batch_size = options.get("batch_size") or DEFAULT_DRAIN_BATCH_SIZE
+        poll_interval = options.get("poll_interval")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+        if poll_interval <= 0:
+            raise CommandError("--poll-interval must be positive")
+
+        self.stdout.write(self.style.NOTICE("Draining webhook inbox"))
+        try:
+            while True:
+                close_old_connections()
+                stats = drain_inbox(batch_size)
+                if stats.failed:
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"{stats.failed} entries could not be written; "
+                            "see the error column of the webhook inbox"
+                        )
+                    )
+                if stats.processed or stats.failed:
+                    self.stdout.write(
+                        f"Wrote {stats.created} new, {stats.updated} updated, "
+                        f"{stats.unchanged} unchanged, "
+                        f"{stats.skipped} superseded or invalid"
+                    )
+                    continue
+                if once:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Inbox drainer stopped")
@@ -5,16 +5,41 @@ Usage:
     python manage.py fetch_kobo_data <form_uid>
     python manage.py fetch_kobo_data <form_uid> --limit 100
     python manage.py fetch_kobo_data <form_uid> --force-update
+    python manage.py fetch_kobo_data <form_uid> --batch-size 1000
+    python manage.py fetch_kobo_data <form_uid> --full
+    python manage.py fetch_kobo_data <form_uid> --concurrency 4
+    python manage.py fetch_kobo_data <form_uid> --async --concurrency 8
+    python manage.py fetch_kobo_data <form_uid> <form_uid> --workers 4
+    python manage.py fetch_kobo_data --all-forms --workers 4
+
+By default only submissions newer than the form's SyncCheckpoint are
+fetched; --full ignores the checkpoint and resyncs everything. Several forms
+are synced in parallel, and a per-form lock stops two runs (in this or any
+other process) from syncing the same form at once. Each sync also stores
+the form's current schema (questions, labels, choices) as a FormSchema.
 """
 
+import asyncio
 import os
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from asgiref.sync import sync_to_async
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
+from django.db import connections
 
-from api.models import KoboSubmission
+from api.models import KoboSubmission, SyncRun
+from api.schemas import save_schema
 from api.services import KoboToolboxClient
+from api.services.async_kobo_client import AsyncKoboToolboxClient
+from api.services.forms import get_cached_forms
+from api.services.locks import FormLockedError
+from api.services.sync import (
+    DEFAULT_BATCH_SIZE,
+    async_sync_form,
+    get_checkpoint_query,
+    sync_form,
+)
 
 
 class Command(BaseCommand):
@@ -22,10 +47,22 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument(
-            "form_uid",
-            nargs="?",
+            "form_uids",
+            nargs="*",
             type=str,
-            help="KoboToolbox form/asset UID (optional if KOBO_FORM_UID env var is set)",
+            metavar="form_uid",
+            help="KoboToolbox form/asset UID(s) (optional if KOBO_FORM_UID env var is set)",
+        )
+        parser.add_argument(
+            "--all-forms",
+            action="store_true",
+            help="Sync every deployed survey the token can access",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of forms synced in parallel (default: 4)",
         )
         parser.add_argument(
             "--limit",
@@ -38,24 +75,124 @@ class Command(BaseCommand):
             action="store_true",
             help="Update existing submissions even if already synced",
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the sync checkpoint and fetch every submission",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of pages fetched from Kobo in parallel (default: 1)",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Fetch with the async HTTP/2 client on an event loop instead of threads",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Number of submissions written per database batch (default: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue the form's last incomplete run after its last committed page",
+        )
+        parser.add_argument(
+            "--fields",
+            type=str,
+            default=None,
+            help=(
+                "Comma-separated submission fields to fetch from Kobo "
+                "(default: the form's KOBO_SYNC_FIELDS entry, else all fields)"
+            ),
+        )
 
     def handle(self, *args, **options):
-        form_uid = options.get("form_uid") or os.getenv("KOBO_FORM_UID")
+        form_uids = options.get("form_uids") or []
+        all_forms = options.get("all_forms", False)
+        if all_forms and form_uids:
+            raise CommandError("Pass form UIDs or --all-forms, not both")
+        if not form_uids and not all_forms and os.getenv("KOBO_FORM_UID"):
+            form_uids = [os.getenv("KOBO_FORM_UID")]
 
-        if not form_uid:
+        if not form_uids and not all_forms:
             raise CommandError(
                 "Form UID is required. Provide it as argument or set KOBO_FORM_UID env variable."
             )
 
+        workers = options.get("workers") or 1
+        if workers < 1:
+            raise CommandError("--workers must be a positive integer")
         limit = options.get("limit")
         force_update = options.get("force_update", False)
+        full = options.get("full", False)
+        concurrency = options.get("concurrency") or 1
+        if concurrency < 1:
+            raise CommandError("--concurrency must be a positive integer")
+        batch_size = options.get("batch_size") or DEFAULT_BATCH_SIZE
+        if batch_size < 1:
+            raise CommandError("--batch-size must be a positive integer")
+
+        sync_options = {
+            "full": full,
+            "limit": limit,
+            "batch_size": batch_size,
+            "force_update": force_update,
+            "concurrency": concurrency,
+            "resume": options.get("resume", False),
+            "fields": self._parse_fields(options.get("fields")),
+        }
+
+        if all_forms or len(form_uids) > 1:
+            if options.get("use_async"):
+                raise CommandError("--async syncs a single form; drop it for several forms")
+            self._sync_many(form_uids, all_forms, workers, sync_options)
+            return
 
+        form_uid = form_uids[0]
         self.stdout.write(
             self.style.NOTICE(f"Fetching submissions from form: {form_uid}")
         )
+        if options.get("use_async"):
+            stats = self._sync_async(form_uid, sync_options)
+        else:
+            stats = self._sync(form_uid, sync_options)
+
+        self._print_summary(form_uid, stats, force_update)
+
+    def _parse_fields(self, value):
+        if not value:
+            return None
+        fields = [field.strip() for field in value.split(",") if field.strip()]
+        if not fields:
+            raise CommandError("--fields must name at least one field")
+        return fields
 
+    def _describe_mode(self, form_uid, full, resume=False):
+        if resume:
+            self.stdout.write("Resuming last incomplete sync run")
+        elif full or not get_checkpoint_query(form_uid):
+            self.stdout.write("Full sync")
+        else:
+            self.stdout.write("Incremental sync from last checkpoint")
+
+    def _report(self, stats):
+        if stats.processed == 0:
+            self.stdout.write(f"Total submissions available: {stats.total}")
+        else:
+            self.stdout.write(f"Synced {stats.processed} submissions...")
+
+    def _sync(self, form_uid, sync_options):
         try:
-            client = KoboToolboxClient()
+            client = KoboToolboxClient(
+                max_connections=max(10, sync_options["concurrency"])
+            )
         except ValueError as e:
             raise CommandError(str(e))
 
@@ -64,78 +201,146 @@ class Command(BaseCommand):
             form_details = client.get_form_details(form_uid)
             form_name = form_details.get("name", "Unknown")
             self.stdout.write(f"Form name: {form_name}")
+            save_schema(form_uid, form_details)
         except Exception as e:
             self.stdout.write(self.style.WARNING(f"Could not fetch form details: {e}"))
 
-        # Fetch submissions
+        self._describe_mode(form_uid, sync_options["full"], sync_options["resume"])
+
+        # Fetch and write page by page, so memory stays bounded by one page
         try:
-            if limit:
-                submissions = client.get_submissions(form_uid, limit=limit)
-                self.stdout.write(f"Fetched {len(submissions)} submissions")
-            else:
-                total_count = client.get_submission_count(form_uid)
-                self.stdout.write(f"Total submissions available: {total_count}")
-                submissions = client.get_all_submissions(form_uid)
-                self.stdout.write(f"Fetched all {len(submissions)} submissions")
+            return sync_form(client, form_uid, on_progress=self._report, **sync_options)
+        except (SyncRun.DoesNotExist, FormLockedError) as e:
+            raise CommandError(str(e))
         except Exception as e:
-            raise CommandError(f"Failed to fetch submissions: {e}")
-
-        # Sync to database
-        created_count = 0
-        updated_count = 0
-        skipped_count = 0
+            raise CommandError(f"Failed to sync submissions: {e}")
 
-        for submission in submissions:
-            uuid = submission.get("_uuid")
-            if not uuid:
-                self.stdout.write(
-                    self.style.WARNING("Skipping submission without UUID")
-                )
-                skipped_count += 1
-                continue
+    def _sync_async(self, form_uid, sync_options):
+        self._describe_mode(form_uid, sync_options["full"], sync_options["resume"])
 
-            # Parse submission date
-            submission_time_str = submission.get("_submission_time")
-            if submission_time_str:
+        async def run():
+            async with AsyncKoboToolboxClient(
+                max_connections=max(20, sync_options["concurrency"])
+            ) as client:
                 try:
-                    # Parse ISO 8601 format
-                    date_submitted = datetime.fromisoformat(
-                        submission_time_str.replace("Z", "+00:00")
+                    form_details = await client.get_form_details(form_uid)
+                    self.stdout.write(f"Form name: {form_details.get('name', 'Unknown')}")
+                    await sync_to_async(save_schema)(form_uid, form_details)
+                except Exception as e:
+                    self.stdout.write(
+                        self.style.WARNING(f"Could not fetch form details: {e}")
                     )
-                    if timezone.is_naive(date_submitted):
-                        date_submitted = timezone.make_aware(date_submitted)
-                except (ValueError, AttributeError):
-                    date_submitted = timezone.now()
-            else:
-                date_submitted = timezone.now()
-
-            # Create or update
-            obj, created = KoboSubmission.objects.update_or_create(
-                uuid=uuid,
-                defaults={
-                    "form_uid": form_uid,
-                    "data": submission,
-                    "date_submitted": date_submitted,
-                },
-            )
+                return await async_sync_form(
+                    client, form_uid, on_progress=self._report, **sync_options
+                )
 
-            if created:
-                created_count += 1
-            elif force_update:
-                updated_count += 1
-            else:
-                skipped_count += 1
+        try:
+            return asyncio.run(run())
+        except (ImportError, ValueError, SyncRun.DoesNotExist, FormLockedError) as e:
+            raise CommandError(str(e))
+        except Exception as e:
+            raise CommandError(f"Failed to sync submissions: {e}")
 
+    def _print_summary(self, form_uid, stats, force_update):
         # Summary
         self.stdout.write(self.style.SUCCESS("\n=== Sync Summary ==="))
         self.stdout.write(
-            self.style.SUCCESS(f"Created: {created_count} new submissions")
+            self.style.SUCCESS(f"Created: {stats.created} new submissions")
         )
         if force_update:
-            self.stdout.write(self.style.SUCCESS(f"Updated: {updated_count}"))
-        self.stdout.write(f"Skipped: {skipped_count} (already exist)")
+            self.stdout.write(self.style.SUCCESS(f"Updated: {stats.updated}"))
+            self.stdout.write(f"Unchanged: {stats.unchanged} (identical content, not rewritten)")
+        self.stdout.write(
+            f"Skipped: {stats.skipped} (already exist, duplicated or missing UUID)"
+        )
         self.stdout.write(
             self.style.SUCCESS(
                 f"\nTotal in database: {KoboSubmission.objects.filter(form_uid=form_uid).count()}"
             )
         )
+
+    def _sync_many(self, form_uids, all_forms, workers, sync_options):
+        try:
+            client = KoboToolboxClient(
+                max_connections=max(10, workers * sync_options["concurrency"])
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if all_forms:
+            try:
+                forms = get_cached_forms(client, deployed_only=True)
+            except Exception as e:
+                raise CommandError(f"Failed to list forms: {e}")
+            form_uids = [form["uid"] for form in forms]
+            if not form_uids:
+                raise CommandError("No deployed forms found")
+        form_uids = list(dict.fromkeys(form_uids))
+
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Syncing {len(form_uids)} forms with {min(workers, len(form_uids))} workers"
+            )
+        )
+
+        def sync_one(form_uid):
+            started = time.monotonic()
+            try:
+                save_schema(form_uid, client.get_form_details(form_uid))
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f"{form_uid}: could not store form schema: {e}")
+                )
+            try:
+                stats = sync_form(client, form_uid, **sync_options)
+                error = None
+            except Exception as e:
+                stats, error = None, e
+            finally:
+                # Worker threads open their own connections; don't leak them.
+                connections.close_all()
+            elapsed = time.monotonic() - started
+            if error is None:
+                self.stdout.write(
+                    f"{form_uid}: {stats.processed} submissions in {elapsed:.1f}s"
+                )
+            else:
+                self.stdout.write(self.style.WARNING(f"{form_uid}: {error}"))
+            return form_uid, stats, error, elapsed
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(sync_one, form_uids))
+
+        self._print_multi_summary(results, time.monotonic() - started)
+
+    def _print_multi_summary(self, results, elapsed):
+        self.stdout.write(self.style.SUCCESS("\n=== Sync Summary ==="))
+        failed = 0
+        totals = {"created": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        for form_uid, stats, error, seconds in results:
+            if isinstance(error, FormLockedError):
+                self.stdout.write(f"{form_uid}: skipped, already being synced")
+                continue
+            if error is not None:
+                failed += 1
+                self.stdout.write(
+                    self.style.ERROR(f"{form_uid}: failed after {seconds:.1f}s ({error})")
+                )
+                continue
+            for key in totals:
+                totals[key] += getattr(stats, key)
+            self.stdout.write(
+                f"{form_uid}: {stats.created} created, {stats.updated} updated, "
+                f"{stats.unchanged} unchanged, {stats.skipped} skipped "
+                f"in {seconds:.1f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nAll forms: {totals['created']} created, {totals['updated']} updated, "
+                f"{totals['unchanged']} unchanged, {totals['skipped']} skipped "
+                f"in {elapsed:.1f}s"
+            )
+        )
+        if failed:
+            raise CommandError(f"{failed} of {len(results)} forms failed to sync")
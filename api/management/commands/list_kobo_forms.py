@@ -1,22 +1,42 @@
 """
 Management command to list all KoboToolbox forms accessible with your API token.
 Helps identify the correct form UID to use.
+
+The list is cached for KOBO_FORMS_CACHE_TTL seconds; use --refresh to
+fetch it again.
 """
 
 from django.core.management.base import BaseCommand
+from api.services.forms import get_cached_forms
 from api.services.kobo_client import KoboToolboxClient, KoboAPIException
 
 
 class Command(BaseCommand):
     help = "List all KoboToolbox forms accessible with your API token"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deployed",
+            action="store_true",
+            help="Only list surveys with an active deployment",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Ignore the cached form list and fetch it from Kobo again",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE("Fetching your KoboToolbox forms..."))
         self.stdout.write("")
 
         try:
             client = KoboToolboxClient()
-            forms = client.get_forms()
+            forms = get_cached_forms(
+                client,
+                deployed_only=options.get("deployed", False),
+                refresh=options.get("refresh", False),
+            )
 
             if not forms:
                 self.stdout.write(
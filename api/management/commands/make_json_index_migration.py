@@ -0,0 +1,183 @@
+"""
+Django management command writing the migration for KOBO_JSON_INDEXES.
+
+Compares the registry with the state recorded by the previous json index
+migration and writes a migration that adds (and drops) the generated
+columns and their indexes. The SQL runs on MySQL only.
+
+Usage:
+    python manage.py make_json_index_migration
+    python manage.py make_json_index_migration --dry-run
+    python manage.py make_json_index_migration --check
+"""
+
+import os
+import sys
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db.migrations.loader import MigrationLoader
+from django.utils import timezone
+
+from api.json_indexes import diff_indexes, registered_indexes
+from api.models import KoboSubmission
+
+APP_LABEL = "api"
+
+MIGRATION_TEMPLATE = '''# Generated by make_json_index_migration on {timestamp}
+
+from django.db import migrations
+
+TABLE = '{table}'
+
+# (column, column type, expression, index name)
+ADD = [
+{add}]
+
+DROP = [
+{drop}]
+
+
+def _add_columns(schema_editor, columns):
+    for column, column_type, expression, index in columns:
+        schema_editor.execute(
+            f'ALTER TABLE {{TABLE}} ADD COLUMN `{{column}}` {{column_type}} '
+            f'GENERATED ALWAYS AS ({{expression}}) STORED, '
+            f'ADD INDEX `{{index}}` (`{{column}}`)',
+            params=None,
+        )
+
+
+def _drop_columns(schema_editor, columns):
+    for column, column_type, expression, index in columns:
+        schema_editor.execute(
+            f'ALTER TABLE {{TABLE}} DROP INDEX `{{index}}`, DROP COLUMN `{{column}}`',
+            params=None,
+        )
+
+
+def add_json_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    _drop_columns(schema_editor, DROP)
+    _add_columns(schema_editor, ADD)
+
+
+def remove_json_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    _drop_columns(schema_editor, ADD)
+    _add_columns(schema_editor, DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('{app_label}', '{dependency}'),
+    ]
+
+    # KOBO_JSON_INDEXES paths (path -> type) once this migration is applied.
+    json_index_state = {state}
+
+    operations = [
+        migrations.RunPython(add_json_indexes, remove_json_indexes),
+    ]
+'''
+
+
+def _column_lines(indexes):
+    return "".join(
+        f"    {(index.column, index.column_type, index.expression, index.index_name)!r},\n"
+        for index in indexes
+    )
+
+
+def render_migration(dependency, add, drop, state):
+    """Source of a json index migration following ``dependency``."""
+    return MIGRATION_TEMPLATE.format(
+        timestamp=timezone.now().strftime("%Y-%m-%d %H:%M"),
+        table=KoboSubmission._meta.db_table,
+        add=_column_lines(add),
+        drop=_column_lines(drop),
+        app_label=APP_LABEL,
+        dependency=dependency,
+        state=repr(dict(sorted(state.items()))),
+    )
+
+
+def migrated_state(loader):
+    """
+    The leaf api migration and the json index state recorded up to it.
+
+    Raises:
+        CommandError: the app has conflicting leaf migrations
+    """
+    leaves = loader.graph.leaf_nodes(APP_LABEL)
+    if len(leaves) != 1:
+        raise CommandError(
+            f"Conflicting {APP_LABEL} migrations {sorted(name for _, name in leaves)}; "
+            "merge them first"
+        )
+    state = {}
+    for key in loader.graph.forwards_plan(leaves[0]):
+        if key[0] != APP_LABEL:
+            continue
+        migration = loader.graph.nodes[key]
+        if hasattr(migration, "json_index_state"):
+            state = migration.json_index_state
+    return leaves[0][1], state
+
+
+class Command(BaseCommand):
+    help = "Write the migration adding generated columns for KOBO_JSON_INDEXES"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show the column changes without writing a migration",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with a non-zero status if a migration is needed",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            indexes = registered_indexes()
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        leaf, state = migrated_state(loader)
+        add, drop = diff_indexes(state, indexes)
+
+        if not add and not drop:
+            self.stdout.write("No changes to KOBO_JSON_INDEXES")
+            return
+
+        for index in drop:
+            self.stdout.write(f"  - {index.path} ({index.type}): drop {index.column}")
+        for index in add:
+            self.stdout.write(f"  + {index.path} ({index.type}): add {index.column}")
+
+        if options.get("check"):
+            self.stdout.write(self.style.WARNING("A json index migration is needed"))
+            sys.exit(1)
+        if options.get("dry_run"):
+            return
+
+        number = int(leaf.split("_", 1)[0]) + 1
+        name = f"{number:04d}_json_indexes"
+        directory = os.path.join(apps.get_app_config(APP_LABEL).path, "migrations")
+        path = os.path.join(directory, f"{name}.py")
+        source = render_migration(
+            leaf, add, drop, {path: index.type for path, index in indexes.items()}
+        )
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(source)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {os.path.relpath(path)}"))
+        self.stdout.write("Run `python manage.py migrate` to create the columns.")
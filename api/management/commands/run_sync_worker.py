@@ -0,0 +1,71 @@
+"""
+Django management command that runs queued Kobo sync jobs.
+
+Usage:
+    python manage.py run_sync_worker
+    python manage.py run_sync_worker --once
+    python manage.py run_sync_worker --poll-interval 10
+
+Any number of workers can run side by side; jobs are claimed from the
+database, so no external broker is needed.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from api.services.jobs import claim_next_job, default_worker_name, run_sync_job
+
+
+class Command(BaseCommand):
+    help = "Run queued KoboToolbox sync jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run every queued job, then exit instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the queue is empty (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        once = options.get("once", False)
+        poll_interval = options.get("poll_interval")
+        if poll_interval <= 0:
+            raise CommandError("--poll-interval must be positive")
+
+        worker = default_worker_name()
+        self.stdout.write(self.style.NOTICE(f"Sync worker {worker} started"))
+
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job(worker)
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.stdout.write(f"Running sync job #{job.pk} for {job.form_uid}")
+                run_sync_job(job)
+                if job.status == job.STATUS_SUCCEEDED:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Job #{job.pk} done: {job.created} created, "
+                            f"{job.updated} updated, {job.unchanged} unchanged, "
+                            f"{job.skipped} skipped"
+                        )
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.ERROR(f"Job #{job.pk} failed: {job.error}")
+                    )
+        except KeyboardInterrupt:
+            self.stdout.write("Sync worker stopped")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_uid', models.CharField(help_text='Kobo form/asset UID', max_length=100, unique=True)),
+                ('last_submission_id', models.BigIntegerField(blank=True, help_text='Highest Kobo _id synced', null=True)),
+                ('last_submission_time', models.DateTimeField(blank=True, help_text='Latest _submission_time synced', null=True)),
+                ('date_updated', models.DateTimeField(auto_now=True, help_text='When the checkpoint last moved')),
+            ],
+            options={
+                'verbose_name': 'Sync Checkpoint',
+                'verbose_name_plural': 'Sync Checkpoints',
+            },
+        ),
+    ]
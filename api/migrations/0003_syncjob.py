@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-16 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_synccheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_uid', models.CharField(db_index=True, help_text='Kobo form/asset UID', max_length=100)),
+                ('full', models.BooleanField(default=False, help_text='Ignore the sync checkpoint and fetch everything')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('total', models.PositiveIntegerField(blank=True, help_text='Submissions Kobo reported for this run', null=True)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', help_text='Worker that ran the job', max_length=200)),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('date_started', models.DateTimeField(blank=True, null=True)),
+                ('date_finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Job',
+                'verbose_name_plural': 'Sync Jobs',
+                'ordering': ['-date_created'],
+                'indexes': [models.Index(fields=['status', 'date_created'], name='api_syncjob_status_f84335_idx')],
+            },
+        ),
+    ]
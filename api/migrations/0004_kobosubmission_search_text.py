@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:05
+
+from django.db import migrations, models
+
+FULLTEXT_INDEX = 'api_kobosub_search_text_ft'
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON api_kobosubmission (search_text)'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'DROP INDEX {FULLTEXT_INDEX} ON api_kobosubmission')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kobosubmission',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Normalized answers (no metadata) for full-text search'),
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
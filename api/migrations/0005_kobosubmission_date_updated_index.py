@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-16 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_kobosubmission_search_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kobosubmission',
+            index=models.Index(fields=['date_updated', 'id'], name='api_kobosub_date_up_d0b905_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-16 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_kobosubmission_date_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uuid', models.CharField(db_index=True, help_text='Kobo submission UUID (_uuid)', max_length=100)),
+                ('form_uid', models.CharField(help_text='Kobo form/asset UID', max_length=100)),
+                ('payload', models.JSONField(help_text='Webhook body as received')),
+                ('date_received', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Inbox Entry',
+                'verbose_name_plural': 'Webhook Inbox',
+            },
+        ),
+    ]
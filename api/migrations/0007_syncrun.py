@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_webhookinbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_uid', models.CharField(help_text='Kobo form/asset UID', max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('query', models.JSONField(blank=True, help_text='Kobo query the run started with', null=True)),
+                ('last_submission_id', models.BigIntegerField(blank=True, help_text='Highest Kobo _id committed by this run', null=True)),
+                ('pages_committed', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('date_started', models.DateTimeField(auto_now_add=True)),
+                ('date_finished', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Sync Run',
+                'verbose_name_plural': 'Sync Runs',
+                'ordering': ['-date_started'],
+                'indexes': [models.Index(fields=['form_uid', 'status'], name='api_syncrun_form_ui_dbbd1c_idx')],
+            },
+        ),
+    ]
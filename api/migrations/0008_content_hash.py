@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-16 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kobosubmission',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, help_text='SHA-256 of the canonicalized data, used to skip unchanged rewrites', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='syncjob',
+            name='unchanged',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='syncrun',
+            name='unchanged',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
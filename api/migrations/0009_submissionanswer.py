@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-16 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_uid', models.CharField(help_text='Kobo form/asset UID', max_length=100)),
+                ('field_path', models.CharField(help_text='Question path, e.g. group_location/district', max_length=255)),
+                ('value_text', models.CharField(blank=True, default='', help_text='Answer text (truncated)', max_length=255)),
+                ('value_num', models.FloatField(blank=True, null=True)),
+                ('value_date', models.DateTimeField(blank=True, null=True)),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='api.kobosubmission')),
+            ],
+            options={
+                'verbose_name': 'Submission Answer',
+                'verbose_name_plural': 'Submission Answers',
+                'indexes': [models.Index(fields=['form_uid', 'field_path', 'value_text'], name='api_submiss_form_ui_562e90_idx'), models.Index(fields=['form_uid', 'field_path', 'value_num'], name='api_submiss_form_ui_0f6f7f_idx'), models.Index(fields=['form_uid', 'field_path', 'value_date'], name='api_submiss_form_ui_350230_idx')],
+            },
+        ),
+    ]
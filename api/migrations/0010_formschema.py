@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-16 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_submissionanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FormSchema',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('form_uid', models.CharField(help_text='Kobo form/asset UID', max_length=100)),
+                ('version_id', models.CharField(help_text='Kobo asset version_id the content belongs to', max_length=100)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('questions', models.JSONField(default=list, help_text='Parsed survey rows')),
+                ('date_fetched', models.DateTimeField(auto_now=True, help_text='When the content was last fetched from Kobo')),
+            ],
+            options={
+                'verbose_name': 'Form Schema',
+                'verbose_name_plural': 'Form Schemas',
+                'ordering': ['-date_fetched'],
+                'get_latest_by': 'date_fetched',
+                'constraints': [models.UniqueConstraint(fields=('form_uid', 'version_id'), name='api_formschema_version_uniq')],
+            },
+        ),
+    ]
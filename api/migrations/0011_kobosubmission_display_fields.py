@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-16 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_formschema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kobosubmission',
+            name='display_fields',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Labelled answers (no metadata) shown on the detail page'),
+        ),
+        migrations.AddField(
+            model_name='kobosubmission',
+            name='preview',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='First answers, truncated, shown on the submission cards'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_kobosubmission_display_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='date_heartbeat',
+            field=models.DateTimeField(blank=True, help_text='Last sign of life from the worker running the job', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_syncjob_date_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookinbox',
+            name='error',
+            field=models.TextField(blank=True, help_text='Why the entry could not be written; such entries are no longer drained'),
+        ),
+    ]
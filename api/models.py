@@ -1,3 +1,5 @@
+from datetime import timezone as dt_timezone
+
 from django.db import models
 
 
@@ -17,6 +19,31 @@ class KoboSubmission(models.Model):
         max_length=100, db_index=True, help_text="Kobo form/asset UID"
     )
     data = models.JSONField(help_text="Complete submission data from Kobo")
+    search_text = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Normalized answers (no metadata) for full-text search",
+    )
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="SHA-256 of the canonicalized data, used to skip unchanged rewrites",
+    )
+    display_fields = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Labelled answers (no metadata) shown on the detail page",
+    )
+    preview = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="First answers, truncated, shown on the submission cards",
+    )
     date_submitted = models.DateTimeField(
         db_index=True, help_text="Submission timestamp from Kobo"
     )
@@ -34,7 +61,273 @@ class KoboSubmission(models.Model):
         indexes = [
             models.Index(fields=["-date_submitted"]),
             models.Index(fields=["form_uid", "-date_submitted"]),
+            # Serves the changes feed: WHERE date_updated > ? ORDER BY date_updated, id
+            models.Index(fields=["date_updated", "id"]),
         ]
 
     def __str__(self):
         return f"{self.form_uid} - {self.uuid[:8]} ({self.date_submitted})"
+
+
+class SubmissionAnswer(models.Model):
+    """
+    One answer of a submission, flattened out of ``KoboSubmission.data``.
+
+    Rewritten whenever the submission is written (see api/answers.py), so
+    answer filters can use the composite indexes below instead of scanning
+    JSON. Every answer keeps its text; values that parse as a number or a
+    date also fill ``value_num`` / ``value_date`` for range filters.
+    """
+
+    submission = models.ForeignKey(
+        KoboSubmission, on_delete=models.CASCADE, related_name="answers"
+    )
+    form_uid = models.CharField(max_length=100, help_text="Kobo form/asset UID")
+    field_path = models.CharField(
+        max_length=255, help_text="Question path, e.g. group_location/district"
+    )
+    value_text = models.CharField(
+        max_length=255, blank=True, default="", help_text="Answer text (truncated)"
+    )
+    value_num = models.FloatField(null=True, blank=True)
+    value_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Submission Answer"
+        verbose_name_plural = "Submission Answers"
+        indexes = [
+            models.Index(fields=["form_uid", "field_path", "value_text"]),
+            models.Index(fields=["form_uid", "field_path", "value_num"]),
+            models.Index(fields=["form_uid", "field_path", "value_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.field_path} = {self.value_text}"
+
+
+class FormSchema(models.Model):
+    """
+    Parsed XLSForm questions of one version of a Kobo form.
+
+    Saved from the asset ``content`` whenever fetch_kobo_data syncs the form
+    (see api/schemas.py). ``questions`` lists one entry per survey row in form
+    order: path, type, label and, for selects, the choice labels.
+    """
+
+    form_uid = models.CharField(max_length=100, help_text="Kobo form/asset UID")
+    version_id = models.CharField(
+        max_length=100, help_text="Kobo asset version_id the content belongs to"
+    )
+    name = models.CharField(max_length=255, blank=True, default="")
+    questions = models.JSONField(default=list, help_text="Parsed survey rows")
+    date_fetched = models.DateTimeField(
+        auto_now=True, help_text="When the content was last fetched from Kobo"
+    )
+
+    class Meta:
+        ordering = ["-date_fetched"]
+        get_latest_by = "date_fetched"
+        verbose_name = "Form Schema"
+        verbose_name_plural = "Form Schemas"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["form_uid", "version_id"], name="api_formschema_version_uniq"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.form_uid} @ {self.version_id}"
+
+
+class SyncCheckpoint(models.Model):
+    """
+    High-water mark of the last sync for a Kobo form.
+
+    Incremental syncs only ask Kobo for submissions newer than this mark.
+    """
+
+    form_uid = models.CharField(
+        max_length=100, unique=True, help_text="Kobo form/asset UID"
+    )
+    last_submission_id = models.BigIntegerField(
+        null=True, blank=True, help_text="Highest Kobo _id synced"
+    )
+    last_submission_time = models.DateTimeField(
+        null=True, blank=True, help_text="Latest _submission_time synced"
+    )
+    date_updated = models.DateTimeField(
+        auto_now=True, help_text="When the checkpoint last moved"
+    )
+
+    class Meta:
+        verbose_name = "Sync Checkpoint"
+        verbose_name_plural = "Sync Checkpoints"
+
+    def __str__(self):
+        return f"{self.form_uid} @ {self.last_submission_id}"
+
+    def build_query(self):
+        """Mongo-style Kobo query selecting submissions after this mark."""
+        if self.last_submission_id is not None:
+            return {"_id": {"$gt": self.last_submission_id}}
+        if self.last_submission_time is not None:
+            # Kobo stores _submission_time as a naive UTC ISO string.
+            value = self.last_submission_time.astimezone(dt_timezone.utc)
+            return {"_submission_time": {"$gt": value.strftime("%Y-%m-%dT%H:%M:%S")}}
+        return None
+
+
+class SyncJob(models.Model):
+    """
+    A queued "sync this form from Kobo" request.
+
+    Created by the web "Sync Now" action and executed out of the request
+    cycle by the run_sync_worker command, which claims queued rows with
+    SELECT ... FOR UPDATE SKIP LOCKED so the database doubles as the queue.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_SUCCEEDED, "Succeeded"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    form_uid = models.CharField(
+        max_length=100, db_index=True, help_text="Kobo form/asset UID"
+    )
+    full = models.BooleanField(
+        default=False, help_text="Ignore the sync checkpoint and fetch everything"
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    total = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Submissions Kobo reported for this run"
+    )
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    worker = models.CharField(
+        max_length=200, blank=True, default="", help_text="Worker that ran the job"
+    )
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_heartbeat = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last sign of life from the worker running the job",
+    )
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-date_created"]
+        verbose_name = "Sync Job"
+        verbose_name_plural = "Sync Jobs"
+        indexes = [
+            models.Index(fields=["status", "date_created"]),
+        ]
+
+    def __str__(self):
+        return f"{self.form_uid} [{self.status}] #{self.pk}"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+
+class WebhookInbox(models.Model):
+    """
+    Raw webhook payload waiting to be written as a KoboSubmission.
+
+    In queued webhook mode the view only appends here and returns 202; the
+    drain_webhook_inbox command coalesces rows into batched upserts.
+    """
+
+    uuid = models.CharField(
+        max_length=100, db_index=True, help_text="Kobo submission UUID (_uuid)"
+    )
+    form_uid = models.CharField(max_length=100, help_text="Kobo form/asset UID")
+    payload = models.JSONField(help_text="Webhook body as received")
+    error = models.TextField(
+        blank=True,
+        help_text=(
+            "Why the entry could not be written; such entries are no longer drained"
+        ),
+    )
+    date_received = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Webhook Inbox Entry"
+        verbose_name_plural = "Webhook Inbox"
+
+    def __str__(self):
+        return f"{self.form_uid} - {self.uuid[:8]} ({self.date_received})"
+
+
+class SyncRun(models.Model):
+    """
+    Progress of one fetch_kobo_data run, committed page by page.
+
+    Every page is written in the same transaction as the run's
+    last_submission_id, so an interrupted run can be resumed right after the
+    last committed page (``fetch_kobo_data --resume``).
+    """
+
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    # A "running" row whose process died is just as resumable as a failed one.
+    INCOMPLETE_STATUSES = (STATUS_RUNNING, STATUS_FAILED)
+
+    form_uid = models.CharField(max_length=100, help_text="Kobo form/asset UID")
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING
+    )
+    query = models.JSONField(
+        null=True, blank=True, help_text="Kobo query the run started with"
+    )
+    last_submission_id = models.BigIntegerField(
+        null=True, blank=True, help_text="Highest Kobo _id committed by this run"
+    )
+    pages_committed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    date_started = models.DateTimeField(auto_now_add=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-date_started"]
+        verbose_name = "Sync Run"
+        verbose_name_plural = "Sync Runs"
+        indexes = [
+            models.Index(fields=["form_uid", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.form_uid} [{self.status}] #{self.pk}"
+
+    def resume_query(self):
+        """The run's query, narrowed to submissions after the last committed page."""
+        if self.last_submission_id is None:
+            return self.query
+        after_last = {"_id": {"$gt": self.last_submission_id}}
+        if not self.query:
+            return after_last
+        return {"$and": [self.query, after_last]}
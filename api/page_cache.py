@@ -0,0 +1,97 @@
+"""
+Cached rendering of the submission pages.
+
+- The detail page caches its answers fragment keyed on the submission's
+  (pk, date_updated). Every rewrite moves date_updated, so an old fragment
+  is simply never read again. Backfills, which leave date_updated alone,
+  delete the fragments they change.
+- The list page is cached whole, keyed on its query string and a generation
+  token: the form's for ``?form_uid=`` pages, the global one otherwise.
+
+Writes bump the generations of the forms they touch, plus the global one:
+the bulk upsert (sync and inbox drain) once per batch, and single saves and
+deletes (webhook, admin) through model signals. The bump happens right away
+and again on commit, so a page rendered from pre-commit rows while the write
+is in flight is not kept. Old pages are not deleted, only no longer looked
+up, so this works on any cache backend, including local-memory and
+file-based ones.
+"""
+
+import hashlib
+import time
+from typing import Iterable
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.http import QueryDict
+from django.utils import dateformat
+
+from .models import KoboSubmission
+
+GLOBAL_SCOPE = "*"
+GENERATION_KEY = "submissions:generation:{}"
+LIST_PAGE_KEY = "submissions:list:{}:{}"
+# {% cache %} fragment name in api/submission_detail.html
+DETAIL_FRAGMENT = "submission_answers"
+
+
+def cache_ttl() -> int:
+    """Seconds cached pages and fragments are kept (SUBMISSION_CACHE_TTL)."""
+    return getattr(settings, "SUBMISSION_CACHE_TTL", 3600)
+
+
+def _new_generation() -> int:
+    # Unique rather than incremented, so a token evicted from the cache and
+    # created again never matches pages cached under its old value.
+    return time.time_ns()
+
+
+def get_generation(scope: str) -> int:
+    key = GENERATION_KEY.format(scope)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generations(form_uids: Iterable[str]) -> None:
+    """Invalidate the cached list pages of these forms and the global ones."""
+    for scope in set(form_uids) | {GLOBAL_SCOPE}:
+        cache.set(GENERATION_KEY.format(scope), _new_generation(), timeout=None)
+
+
+def invalidate_forms(form_uids: Iterable[str]) -> None:
+    """Bump the forms' generations now and once the current transaction commits."""
+    form_uids = set(form_uids)
+    bump_generations(form_uids)
+    transaction.on_commit(lambda: bump_generations(form_uids))
+
+
+def list_page_key(params: QueryDict) -> str:
+    """Cache key of a list page for its query string and current generation."""
+    scope = params.get("form_uid") or GLOBAL_SCOPE
+    query = urlencode(sorted(params.lists()), doseq=True)
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return LIST_PAGE_KEY.format(get_generation(scope), digest)
+
+
+def fragment_key(submission: KoboSubmission) -> str:
+    """Key of a submission's detail fragment, as the template computes it."""
+    return make_template_fragment_key(
+        DETAIL_FRAGMENT,
+        [submission.pk, dateformat.format(submission.date_updated, "U.u")],
+    )
+
+
+def invalidate_fragments(submissions: Iterable[KoboSubmission]) -> None:
+    """Delete cached detail fragments (needs pk and date_updated loaded)."""
+    cache.delete_many([fragment_key(submission) for submission in submissions])
+
+
+def invalidate_submission(sender, instance, **kwargs) -> None:
+    """post_save / post_delete receiver for KoboSubmission."""
+    invalidate_forms([instance.form_uid])
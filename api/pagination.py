@@ -0,0 +1,253 @@
+"""
+Keyset (seek) pagination helpers.
+
+Pages are addressed by an opaque cursor holding the sort key of the last
+row shown instead of an OFFSET, so fetching page 500 costs the same index
+range scan as page 1. Used by the submissions web page (keyset_paginate)
+and the REST API (SubmissionPagination).
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort-key values (datetimes become ISO strings) into a URL-safe token."""
+    payload = [v.isoformat() if hasattr(v, "isoformat") else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[List[Any]]:
+    """Decode a token from encode_cursor, or None if it is missing or malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+@dataclass
+class KeysetPage:
+    """One page of rows plus cursors for its neighbours."""
+
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+
+def _seek_filter(
+    date_field: str, value: Any, pk: int, forward: bool
+) -> Q:
+    # Rows strictly after (value, pk) in (-date_field, -id) order, or strictly
+    # before it when paging backwards.
+    cmp = "lt" if forward else "gt"
+    return Q(**{f"{date_field}__{cmp}": value}) | Q(
+        **{date_field: value, f"id__{cmp}": pk}
+    )
+
+
+def decode_key(token: Optional[str]) -> Optional[Tuple[Any, int]]:
+    """Decode a (datetime, id) sort key cursor, or None if missing or malformed."""
+    values = decode_cursor(token)
+    if not values or len(values) != 2:
+        return None
+    value = parse_datetime(values[0]) if isinstance(values[0], str) else None
+    try:
+        pk = int(values[1])
+    except (TypeError, ValueError):
+        return None
+    if value is None:
+        return None
+    return value, pk
+
+
+def _keyset_query(
+    queryset: QuerySet,
+    page_size: int,
+    after: Optional[str],
+    before: Optional[str],
+    date_field: str,
+) -> Tuple[QuerySet, bool, bool]:
+    # Returns (query fetching page_size + 1 rows, paging backwards?, came
+    # from a previous page?).
+    after_key = decode_key(after)
+    before_key = decode_key(before) if after_key is None else None
+
+    if before_key is not None:
+        query = queryset.filter(
+            _seek_filter(date_field, *before_key, forward=False)
+        ).order_by(date_field, "id")
+        return query[: page_size + 1], True, False
+
+    if after_key is not None:
+        queryset = queryset.filter(_seek_filter(date_field, *after_key, forward=True))
+    query = queryset.order_by(f"-{date_field}", "-id")
+    return query[: page_size + 1], False, after_key is not None
+
+
+def _keyset_page(
+    rows: List[Any],
+    page_size: int,
+    backwards: bool,
+    from_previous: bool,
+    date_field: str,
+) -> KeysetPage:
+    if backwards:
+        has_more_before = len(rows) > page_size
+        rows = list(reversed(rows[:page_size]))
+        has_more_after = True
+    else:
+        has_more_after = len(rows) > page_size
+        rows = rows[:page_size]
+        has_more_before = from_previous
+
+    page = KeysetPage(items=rows)
+    if rows and has_more_after:
+        last = rows[-1]
+        page.next_cursor = encode_cursor([getattr(last, date_field), last.pk])
+    if rows and has_more_before:
+        first = rows[0]
+        page.previous_cursor = encode_cursor([getattr(first, date_field), first.pk])
+    return page
+
+
+def keyset_paginate(
+    queryset: QuerySet,
+    page_size: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    date_field: str = "date_submitted",
+) -> KeysetPage:
+    """
+    Return one page of ``queryset`` ordered newest first by (date_field, id).
+
+    Args:
+        queryset: Rows to paginate (any existing ordering is replaced)
+        page_size: Rows per page
+        after: Cursor of the last row of the previous page (page forwards)
+        before: Cursor of the first row of the next page (page backwards)
+        date_field: Datetime column leading the sort key
+
+    Returns:
+        KeysetPage with the rows and next/previous cursors (None at the ends)
+    """
+    query, backwards, from_previous = _keyset_query(
+        queryset, page_size, after, before, date_field
+    )
+    return _keyset_page(list(query), page_size, backwards, from_previous, date_field)
+
+
+async def akeyset_paginate(
+    queryset: QuerySet,
+    page_size: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    date_field: str = "date_submitted",
+) -> KeysetPage:
+    """Async variant of keyset_paginate, for async views."""
+    query, backwards, from_previous = _keyset_query(
+        queryset, page_size, after, before, date_field
+    )
+    rows = [row async for row in query]
+    return _keyset_page(rows, page_size, backwards, from_previous, date_field)
+
+
+def approximate_count(queryset: QuerySet, cap: int = 10000) -> Tuple[int, bool]:
+    """
+    Cheap row count for display.
+
+    An unfiltered MySQL table uses InnoDB's table statistics instead of a
+    full COUNT(*). Otherwise counting stops at ``cap`` rows.
+
+    Returns:
+        (count, is_estimate) where is_estimate is True for statistics or a
+        capped count
+    """
+    if connection.vendor == "mysql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0]), True
+
+    count = queryset.order_by().values("pk")[: cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class SubmissionCursorPagination(CursorPagination):
+    """
+    Cursor pagination over (-date_submitted, -id).
+
+    InnoDB secondary indexes carry the primary key, so the date_submitted
+    and (form_uid, -date_submitted) indexes already serve this sort key.
+    """
+
+    ordering = ("-date_submitted", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class SubmissionOffsetPagination(LimitOffsetPagination):
+    """Classic ?limit=&offset= pages, for clients that need random access."""
+
+    max_limit = 1000
+
+
+class SubmissionPagination(BasePagination):
+    """
+    Cursor pagination by default; ``?pagination=offset`` opts into
+    limit/offset pages for older clients.
+    """
+
+    mode_query_param = "pagination"
+    offset_mode = "offset"
+
+    def __init__(self):
+        self.cursor = SubmissionCursorPagination()
+        self.offset = SubmissionOffsetPagination()
+        self.delegate = self.cursor
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == self.offset_mode:
+            self.delegate = self.offset
+        else:
+            self.delegate = self.cursor
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.cursor.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.cursor.get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to 'offset' to page with limit/offset instead of cursors.",
+                "schema": {"type": "string", "enum": [self.offset_mode]},
+            }
+        ] + self.offset.get_schema_operation_parameters(view)
@@ -0,0 +1,243 @@
+"""
+Form schemas parsed from Kobo asset content.
+
+``get_form_details`` returns the XLSForm ``content`` of an asset: survey rows
+with their types and labels, and the choice lists of select questions.
+fetch_kobo_data stores it as a FormSchema per asset ``version_id``, so labels,
+CSV columns and answer types come from the form itself instead of being
+guessed from the answer keys.
+
+Schemas are read through a process-local LRU cache. A version's content never
+changes, so cached entries never go stale; only "the latest version" of a
+form is looked up again on every call.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .models import FormSchema
+
+SCHEMA_CACHE_SIZE = 256
+
+GROUP_TYPES = ("begin_group", "begin group")
+REPEAT_TYPES = ("begin_repeat", "begin repeat")
+END_TYPES = ("end_group", "end group", "end_repeat", "end repeat")
+
+# Question types whose answers are typed as numbers or dates.
+NUMBER_TYPES = ("integer", "decimal", "range")
+DATE_TYPES = ("date", "datetime", "start", "end", "today")
+# Answer types holding free text or choice names, never cast.
+TEXT_TYPES = ("text", "select_one", "select_multiple", "barcode", "email")
+# Rows without an answer of their own in ``data``.
+NO_ANSWER_TYPES = ("group", "note")
+
+
+@dataclass(frozen=True)
+class Question:
+    """One survey row of a form version."""
+
+    path: str
+    type: str
+    label: str = ""
+    choices: Dict[str, str] = field(default_factory=dict)
+    # Path of the enclosing repeat group; its answers live inside that list.
+    repeat: str = ""
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Questions of one form version, by path, in form order."""
+
+    form_uid: str
+    version_id: str
+    questions: Dict[str, Question]
+
+    def label(self, path: str) -> Optional[str]:
+        question = self.questions.get(path)
+        return question.label if question is not None and question.label else None
+
+    def choice_label(self, path: str, value: Any) -> Optional[str]:
+        question = self.questions.get(path)
+        if question is None or not question.choices:
+            return None
+        return question.choices.get(str(value))
+
+    def value_kind(self, path: str) -> Optional[str]:
+        """"number", "date" or "text" for typed questions, None to guess."""
+        question = self.questions.get(path)
+        if question is None:
+            return None
+        if question.type in NUMBER_TYPES:
+            return "number"
+        if question.type in DATE_TYPES:
+            return "date"
+        if question.type in TEXT_TYPES:
+            return "text"
+        return None
+
+    @property
+    def columns(self) -> List[str]:
+        """Top-level answer keys of ``data``, one per CSV column."""
+        return [
+            question.path
+            for question in self.questions.values()
+            if not question.repeat and question.type not in NO_ANSWER_TYPES
+        ]
+
+
+def _first_label(label: Any) -> str:
+    # Kobo sends one label per translation.
+    if isinstance(label, (list, tuple)):
+        label = next((item for item in label if item), "")
+    return str(label or "")
+
+
+def _row_name(row: Dict[str, Any]) -> str:
+    return str(row.get("name") or row.get("$autoname") or "")
+
+
+def _split_type(row: Dict[str, Any]):
+    # Older content spells selects as "select_one list_name".
+    row_type, _, list_name = str(row.get("type", "")).partition(" ")
+    return row_type, row.get("select_from_list_name") or list_name
+
+
+def parse_content(content: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Question entries of an asset's XLSForm content, in form order."""
+    choices: Dict[str, Dict[str, str]] = {}
+    for choice in content.get("choices") or []:
+        name = choice.get("name", choice.get("$autovalue"))
+        if choice.get("list_name") and name is not None:
+            choices.setdefault(choice["list_name"], {})[str(name)] = _first_label(
+                choice.get("label")
+            ) or str(name)
+
+    questions: List[Dict[str, Any]] = []
+    # (path, is_repeat) of the groups enclosing the current row
+    groups: List[Tuple[str, bool]] = []
+    for row in content.get("survey") or []:
+        row_type, list_name = _split_type(row)
+        if row_type in END_TYPES:
+            if groups:
+                groups.pop()
+            continue
+
+        name = _row_name(row)
+        if not name:
+            continue
+        path = f"{groups[-1][0]}/{name}" if groups else name
+        is_group = row_type in GROUP_TYPES or row_type in REPEAT_TYPES
+
+        entry: Dict[str, Any] = {"path": path, "label": _first_label(row.get("label"))}
+        if row_type in GROUP_TYPES:
+            entry["type"] = "group"
+        elif row_type in REPEAT_TYPES:
+            entry["type"] = "repeat"
+        else:
+            entry["type"] = row_type
+        if list_name in choices:
+            entry["choices"] = choices[list_name]
+        repeat = next((group for group, is_repeat in reversed(groups) if is_repeat), "")
+        if repeat:
+            entry["repeat"] = repeat
+        questions.append(entry)
+
+        if is_group:
+            groups.append((path, row_type in REPEAT_TYPES))
+    return questions
+
+
+def save_schema(form_uid: str, asset: Dict[str, Any]) -> Optional[FormSchema]:
+    """
+    Store the schema of an asset as returned by ``get_form_details``.
+
+    Returns:
+        The FormSchema, or None when the asset has no content or version
+    """
+    version_id = asset.get("version_id")
+    content = asset.get("content")
+    if not version_id or not isinstance(content, dict):
+        return None
+    schema, _ = FormSchema.objects.update_or_create(
+        form_uid=form_uid,
+        version_id=version_id,
+        defaults={
+            "name": asset.get("name") or "",
+            "questions": parse_content(content),
+        },
+    )
+    return schema
+
+
+def _build_schema(row: FormSchema) -> Schema:
+    questions = {}
+    for entry in row.questions:
+        question = Question(
+            path=entry["path"],
+            type=entry.get("type", ""),
+            label=entry.get("label", ""),
+            choices=entry.get("choices") or {},
+            repeat=entry.get("repeat", ""),
+        )
+        questions[question.path] = question
+    return Schema(form_uid=row.form_uid, version_id=row.version_id, questions=questions)
+
+
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def _cached_schema(form_uid: str, version_id: str) -> Schema:
+    # Raises DoesNotExist for unknown versions, which lru_cache does not
+    # remember, so a version stored later is picked up.
+    return _build_schema(FormSchema.objects.get(form_uid=form_uid, version_id=version_id))
+
+
+def clear_schema_cache() -> None:
+    _cached_schema.cache_clear()
+
+
+def get_schema(form_uid: str, version_id: Optional[str] = None) -> Optional[Schema]:
+    """
+    The schema of a form version, else the latest one stored for the form.
+
+    Returns:
+        The Schema, or None when no schema was stored for the form
+    """
+    if version_id:
+        try:
+            return _cached_schema(form_uid, str(version_id))
+        except FormSchema.DoesNotExist:
+            pass
+    latest = (
+        FormSchema.objects.filter(form_uid=form_uid)
+        .values_list("version_id", flat=True)
+        .first()
+    )
+    if latest is None:
+        return None
+    try:
+        return _cached_schema(form_uid, latest)
+    except FormSchema.DoesNotExist:
+        return None
+
+
+def submission_version(data: Any) -> Optional[str]:
+    """The form version a submission was made with (``__version__``)."""
+    return data.get("__version__") if isinstance(data, dict) else None
+
+
+def schema_lookup() -> Callable[[str, Any], Optional[Schema]]:
+    """
+    A (form_uid, data) -> Schema function for one batch of submissions.
+
+    Results are memoized per form and version, so a batch of a form without
+    a stored schema costs one query instead of one per row.
+    """
+    schemas: Dict[Tuple[str, Optional[str]], Optional[Schema]] = {}
+
+    def lookup(form_uid: str, data: Any) -> Optional[Schema]:
+        key = (form_uid, submission_version(data))
+        if key not in schemas:
+            schemas[key] = get_schema(*key)
+        return schemas[key]
+
+    return lookup
@@ -0,0 +1,110 @@
+"""
+Full-text search over submission answers.
+
+Each submission carries a denormalized ``search_text`` column holding only
+its answers (Kobo metadata such as ``_uuid``, ``meta/instanceID`` or
+``formhub/uuid`` is stripped), lower-cased and whitespace-normalized. On
+MySQL the column has a FULLTEXT index and is queried with MATCH ... AGAINST;
+other databases fall back to a substring match on the same column.
+"""
+
+import re
+import unicodedata
+from typing import Any, Iterator
+
+from django.db import connection
+from django.db.models import Lookup, Q, QuerySet
+
+from .models import KoboSubmission
+
+# InnoDB ignores shorter words (innodb_ft_min_token_size).
+MIN_TOKEN_SIZE = 3
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Characters with meaning in MySQL boolean-mode queries.
+_BOOLEAN_OPERATORS_RE = re.compile(r'[+\-<>()~*"@]+')
+
+
+def is_metadata_key(key: str) -> bool:
+    """True for Kobo bookkeeping keys that are not answers to questions."""
+    name = key.rsplit("/", 1)[-1]
+    return (
+        key.startswith("_")
+        or name.startswith("_")
+        or key.startswith("formhub")
+        or key.startswith("meta")
+        or "/meta/" in key
+        or name in ("instanceID", "instanceName", "deprecatedID")
+        or name.lower() in ("start", "end")
+    )
+
+
+def _answer_values(value: Any) -> Iterator[str]:
+    if value is None or value == "":
+        return
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not is_metadata_key(key):
+                yield from _answer_values(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _answer_values(item)
+    else:
+        yield str(value)
+
+
+def normalize_text(value: str) -> str:
+    """Case-fold and collapse whitespace so indexing and queries agree."""
+    value = unicodedata.normalize("NFKC", value).casefold()
+    return _WHITESPACE_RE.sub(" ", value).strip()
+
+
+def build_search_text(data: Any) -> str:
+    """Build the ``search_text`` value for a submission's data."""
+    if not isinstance(data, dict):
+        return ""
+    return normalize_text(" ".join(_answer_values(data)))
+
+
+class FullTextMatch(Lookup):
+    """``search_text__match="..."``: MATCH ... AGAINST in boolean mode."""
+
+    lookup_name = "match"
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return (
+            f"MATCH ({lhs}) AGAINST ({rhs} IN BOOLEAN MODE)",
+            list(lhs_params) + list(rhs_params),
+        )
+
+    def as_sql(self, compiler, connection):
+        raise NotImplementedError("Full-text matching is only available on MySQL")
+
+
+KoboSubmission._meta.get_field("search_text").register_lookup(FullTextMatch)
+
+
+def _boolean_query(query: str) -> str:
+    # Require every word, matching as a prefix: "dhak north" finds "Dhaka North".
+    words = _BOOLEAN_OPERATORS_RE.sub(" ", normalize_text(query)).split()
+    return " ".join(f"+{word}*" for word in words if len(word) >= MIN_TOKEN_SIZE)
+
+
+def search_submissions(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Filter submissions whose answers match ``query``.
+
+    A query that looks like a submission UUID prefix also matches on uuid.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    boolean_query = _boolean_query(query) if connection.vendor == "mysql" else ""
+    if boolean_query:
+        answers = Q(search_text__match=boolean_query)
+    else:
+        answers = Q(search_text__contains=normalize_text(query))
+    return queryset.filter(answers | Q(uuid__startswith=query))
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import KoboSubmission
+from .models import KoboSubmission, SyncJob
 
 
 class HealthCheckSerializer(serializers.Serializer):
@@ -29,3 +29,26 @@ class KoboSubmissionSerializer(serializers.ModelSerializer):
             "date_updated",
         ]
         read_only_fields = ["id", "date_synced", "date_updated"]
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    """Progress of a background sync job, polled by the submissions page."""
+
+    class Meta:
+        model = SyncJob
+        fields = [
+            "id",
+            "form_uid",
+            "status",
+            "total",
+            "processed",
+            "created",
+            "updated",
+            "unchanged",
+            "skipped",
+            "error",
+            "date_created",
+            "date_started",
+            "date_finished",
+        ]
+        read_only_fields = fields
@@ -1,3 +1,19 @@
+from .async_kobo_client import AsyncKoboToolboxClient
 from .kobo_client import KoboToolboxClient
+from .sync import (
+    SyncStats,
+    asave_submission,
+    build_submission_fields,
+    save_submission,
+    upsert_submissions,
+)
 
-__all__ = ["KoboToolboxClient"]
+__all__ = [
+    "AsyncKoboToolboxClient",
+    "KoboToolboxClient",
+    "SyncStats",
+    "asave_submission",
+    "build_submission_fields",
+    "save_submission",
+    "upsert_submissions",
+]
@@ -0,0 +1,338 @@
+"""
+Async KoboToolbox API Client
+
+Same surface as KoboToolboxClient, built on a pooled httpx.AsyncClient with
+HTTP/2 keep-alive, so many pages or forms can be fetched concurrently from
+one event loop. Requires ``httpx[http2]``.
+
+Usage:
+    async with AsyncKoboToolboxClient() as client:
+        forms = await client.get_forms()
+        results = await client.get_all_submissions_for_forms(["abc", "def"])
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from api import fastjson
+
+from .kobo_client import (
+    ASSET_PAGE_SIZE,
+    ID_ASCENDING,
+    PAGE_SIZE,
+    KoboAPIException,
+    KoboCircuitOpenError,
+    KoboToolboxClient,
+    after_id,
+)
+from .resilience import CircuitBreaker, RetryPolicy, TokenBucket, parse_retry_after
+
+
+class AsyncKoboToolboxClient:
+    """Async client for the KoboToolbox API (see KoboToolboxClient)."""
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: int = 30,
+        max_connections: int = 20,
+        http2: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize async KoboToolbox API client.
+
+        Args:
+            token: API token from KoboToolbox. If None, reads from KOBO_TOKEN env var.
+            base_url: Base URL for Kobo API. If None, reads from KOBO_BASE_URL env var.
+            timeout: Request timeout in seconds (default 30).
+            max_connections: Size of the connection pool (default 20).
+            http2: Negotiate HTTP/2, multiplexing requests over one connection.
+            retry_policy: Backoff for 429, 5xx and connection errors.
+            rate_limiter: Optional TokenBucket throttling outgoing requests.
+            circuit_breaker: Fails fast after repeated failures.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncKoboToolboxClient requires httpx: pip install 'httpx[http2]'"
+            )
+
+        self.token = token or os.getenv("KOBO_TOKEN", "")
+        self.base_url = base_url or os.getenv(
+            "KOBO_BASE_URL", "https://kf.kobotoolbox.org"
+        )
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+        if not self.token:
+            raise ValueError(
+                "KOBO_TOKEN must be provided or set as environment variable"
+            )
+
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Token {self.token}",
+                "Accept": "application/json",
+            },
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            http2=http2,
+        )
+
+    async def __aenter__(self) -> "AsyncKoboToolboxClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close pooled connections."""
+        await self.client.aclose()
+
+    async def _make_request(
+        self, method: str, endpoint: str, **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Make HTTP request to Kobo API, retrying like KoboToolboxClient.
+
+        Raises:
+            KoboCircuitOpenError: If the circuit breaker is open
+            KoboAPIException: If request fails or returns error status
+        """
+        url = urljoin(self.base_url, endpoint)
+        attempt = 0
+
+        # Checked once per request, as in KoboToolboxClient._make_request.
+        if not self.circuit_breaker.allow_request():
+            raise KoboCircuitOpenError(
+                "Kobo API circuit open after repeated failures; "
+                f"retrying in {self.circuit_breaker.retry_in:.0f}s"
+            )
+        while True:
+            if self.rate_limiter:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if self.retry_policy.should_retry(attempt):
+                    await asyncio.sleep(self.retry_policy.compute_delay(attempt))
+                    attempt += 1
+                    continue
+                self.circuit_breaker.record_failure()
+                raise KoboAPIException(f"Request failed: {str(e)}") from e
+            except httpx.HTTPError as e:
+                self.circuit_breaker.record_failure()
+                raise KoboAPIException(f"Request failed: {str(e)}") from e
+
+            if (
+                response.status_code in self.retry_policy.retry_statuses
+                and self.retry_policy.should_retry(attempt)
+            ):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                await asyncio.sleep(
+                    self.retry_policy.compute_delay(attempt, retry_after)
+                )
+                attempt += 1
+                continue
+
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+
+            try:
+                response.raise_for_status()
+                return fastjson.loads(response.content)
+            except httpx.HTTPStatusError as e:
+                raise KoboAPIException(
+                    f"HTTP {e.response.status_code}: {e.response.text}"
+                ) from e
+            except ValueError as e:
+                raise KoboAPIException(f"Invalid JSON response: {str(e)}") from e
+
+    async def get_forms(
+        self, deployed_only: bool = False, concurrency: int = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve all forms/assets accessible to the authenticated user.
+
+        Paginates like KoboToolboxClient.iter_forms: the remaining offsets
+        are fetched concurrently when ``concurrency`` is above 1, otherwise
+        ``next`` links are followed.
+        """
+        response = await self._make_request(
+            "GET",
+            "/api/v2/assets/",
+            params=KoboToolboxClient._asset_params(deployed_only, ASSET_PAGE_SIZE, 0),
+        )
+        forms = list(response.get("results", []))
+
+        if concurrency > 1 and response.get("count") is not None:
+            offsets = list(range(ASSET_PAGE_SIZE, response["count"], ASSET_PAGE_SIZE))
+            for i in range(0, len(offsets), concurrency):
+                pages = await asyncio.gather(
+                    *(
+                        self._make_request(
+                            "GET",
+                            "/api/v2/assets/",
+                            params=KoboToolboxClient._asset_params(
+                                deployed_only, ASSET_PAGE_SIZE, offset
+                            ),
+                        )
+                        for offset in offsets[i : i + concurrency]
+                    )
+                )
+                for page in pages:
+                    forms.extend(page.get("results", []))
+            return forms
+
+        next_url = response.get("next")
+        while next_url:
+            response = await self._make_request("GET", next_url)
+            forms.extend(response.get("results", []))
+            next_url = response.get("next")
+        return forms
+
+    async def get_form_details(self, form_uid: str) -> Dict[str, Any]:
+        """Get detailed metadata for a specific form."""
+        return await self._make_request("GET", f"/api/v2/assets/{form_uid}/")
+
+    async def get_submissions(
+        self,
+        form_uid: str,
+        limit: Optional[int] = None,
+        start: int = 0,
+        query: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, int]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch submissions for a specific form (see KoboToolboxClient.get_submissions)."""
+        params = KoboToolboxClient._submission_params(
+            query=query, sort=sort, fields=fields
+        )
+        params["start"] = start
+        if limit:
+            params["limit"] = limit
+
+        response = await self._make_request(
+            "GET", f"/api/v2/assets/{form_uid}/data/", params=params
+        )
+        return response.get("results", [])
+
+    async def get_submission_count(
+        self, form_uid: str, query: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Get the total number of submissions for a form."""
+        params = KoboToolboxClient._submission_params(query=query)
+        params["limit"] = 1
+        response = await self._make_request(
+            "GET", f"/api/v2/assets/{form_uid}/data/", params=params
+        )
+        return response.get("count", 0)
+
+    async def iter_submission_pages(
+        self,
+        form_uid: str,
+        page_size: int = PAGE_SIZE,
+        query: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        fields: Optional[Iterable[str]] = None,
+        count: Optional[int] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield a form's submissions one page at a time, in _id order.
+
+        Pages are fetched by keyset (_id above the last one seen). With
+        ``concurrency`` above 1, page offsets are worked out from ``count``
+        (else get_submission_count) and fetched ``concurrency`` pages at a
+        time.
+        """
+        if concurrency <= 1:
+            last_id = None
+            while True:
+                batch = await self.get_submissions(
+                    form_uid,
+                    limit=page_size,
+                    query=after_id(query, last_id),
+                    sort=ID_ASCENDING,
+                    fields=fields,
+                )
+                if not batch:
+                    return
+                yield batch
+                if len(batch) < page_size:
+                    return
+                last_id = batch[-1]["_id"]
+
+        total = count
+        if total is None:
+            total = await self.get_submission_count(form_uid, query=query)
+        offsets = list(range(0, total, page_size))
+        for i in range(0, len(offsets), concurrency):
+            pages = await asyncio.gather(
+                *(
+                    self.get_submissions(
+                        form_uid,
+                        limit=page_size,
+                        start=start,
+                        query=query,
+                        sort=ID_ASCENDING,
+                        fields=fields,
+                    )
+                    for start in offsets[i : i + concurrency]
+                )
+            )
+            for page in pages:
+                if page:
+                    yield page
+
+    async def get_all_submissions(
+        self,
+        form_uid: str,
+        query: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch all submissions for a form, in _id order."""
+        all_submissions = []
+        async for page in self.iter_submission_pages(
+            form_uid, query=query, concurrency=concurrency, fields=fields
+        ):
+            all_submissions.extend(page)
+        return all_submissions
+
+    async def get_all_submissions_for_forms(
+        self, form_uids: Iterable[str], concurrency: int = 1
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Fetch all submissions of several forms concurrently.
+
+        Returns:
+            Mapping of form UID to its submissions
+        """
+        form_uids = list(form_uids)
+        results = await asyncio.gather(
+            *(
+                self.get_all_submissions(form_uid, concurrency=concurrency)
+                for form_uid in form_uids
+            )
+        )
+        return dict(zip(form_uids, results))
@@ -0,0 +1,53 @@
+"""
+Cached listing of the Kobo forms (assets) an account can access.
+
+Crawling /api/v2/assets/ takes one request per 100 assets, so the result is
+kept in Django's cache for settings.KOBO_FORMS_CACHE_TTL seconds and shared
+by list_kobo_forms and fetch_kobo_data --all-forms.
+"""
+
+import hashlib
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_FORMS_CACHE_TTL = 900
+
+# Assets pages fetched in parallel when (re)crawling the list.
+FORMS_CONCURRENCY = 4
+
+
+def _cache_key(client, deployed_only: bool) -> str:
+    # Different tokens see different assets, so key on server and token.
+    account = hashlib.sha256(f"{client.base_url}|{client.token}".encode()).hexdigest()
+    return f"kobo:forms:{account[:16]}:{'deployed' if deployed_only else 'all'}"
+
+
+def get_cached_forms(
+    client, deployed_only: bool = False, refresh: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    The account's forms, from the cache when fresh, else fetched from Kobo.
+
+    Args:
+        client: KoboToolboxClient used on a cache miss
+        deployed_only: Only surveys with an active deployment
+        refresh: Ignore any cached list and crawl Kobo again
+
+    Returns:
+        List of form metadata dictionaries
+    """
+    key = _cache_key(client, deployed_only)
+    if not refresh:
+        forms = cache.get(key)
+        if forms is not None:
+            return forms
+
+    forms = client.get_forms(deployed_only=deployed_only, concurrency=FORMS_CONCURRENCY)
+    cache.set(
+        key,
+        forms,
+        getattr(settings, "KOBO_FORMS_CACHE_TTL", DEFAULT_FORMS_CACHE_TTL),
+    )
+    return forms
@@ -0,0 +1,115 @@
+"""
+Queued webhook ingestion.
+
+Bursts of Kobo REST Service calls are appended to the WebhookInbox table
+and written later in batches, so the webhook never waits on row locks of
+the submissions table.
+"""
+
+from collections import defaultdict
+from dataclasses import replace
+from typing import Any, Dict, List
+
+from django.db import transaction
+
+from api.models import WebhookInbox
+
+from .sync import SyncStats, upsert_submissions
+
+DEFAULT_DRAIN_BATCH_SIZE = 1000
+
+
+def enqueue_webhook(uuid: str, form_uid: str, payload: Dict[str, Any]) -> WebhookInbox:
+    """Append a webhook payload to the inbox."""
+    return WebhookInbox.objects.create(uuid=uuid, form_uid=form_uid, payload=payload)
+
+
+async def aenqueue_webhook(
+    uuid: str, form_uid: str, payload: Dict[str, Any]
+) -> WebhookInbox:
+    """Async variant of enqueue_webhook, for the ASGI webhook."""
+    return await WebhookInbox.objects.acreate(
+        uuid=uuid, form_uid=form_uid, payload=payload
+    )
+
+
+def drain_inbox(batch_size: int = DEFAULT_DRAIN_BATCH_SIZE) -> SyncStats:
+    """
+    Write up to ``batch_size`` inbox entries as submissions and delete them.
+
+    Entries are taken oldest first and coalesced by UUID, so a submission
+    posted several times in the batch is written once with its latest
+    payload. Claiming uses SKIP LOCKED, but run a single drainer: two
+    drainers could each hold a different version of the same UUID.
+
+    If the batch fails to write, its entries are retried one at a time.
+    Entries that still fail keep their row with ``error`` set and are not
+    claimed again, so one bad payload does not stall the inbox.
+
+    Returns:
+        SyncStats for the batch (all zero when the inbox is empty)
+    """
+    stats = SyncStats()
+    with transaction.atomic():
+        entries = list(
+            WebhookInbox.objects.select_for_update(skip_locked=True)
+            .filter(error="")
+            .order_by("id")[:batch_size]
+        )
+        if not entries:
+            return stats
+
+        latest: Dict[str, WebhookInbox] = {}
+        for entry in entries:
+            latest[entry.uuid] = entry
+        stats.skipped += len(entries) - len(latest)
+
+        by_form: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in latest.values():
+            by_form[entry.form_uid].append(entry.payload)
+        failed: Dict[int, str] = {}
+        try:
+            with transaction.atomic():
+                batch_stats = replace(stats)
+                for form_uid, payloads in by_form.items():
+                    upsert_submissions(
+                        form_uid,
+                        payloads,
+                        batch_size=len(payloads),
+                        force_update=True,
+                        stats=batch_stats,
+                    )
+            stats = batch_stats
+        except Exception:
+            failed = _write_one_by_one(list(latest.values()), stats)
+
+        for entry_id, error in failed.items():
+            WebhookInbox.objects.filter(id=entry_id).update(error=error)
+        WebhookInbox.objects.filter(
+            id__in=[entry.id for entry in entries if entry.id not in failed]
+        ).delete()
+    return stats
+
+
+def _write_one_by_one(
+    entries: List[WebhookInbox], stats: SyncStats
+) -> Dict[int, str]:
+    # Each entry gets its own savepoint; returns the errors by entry id.
+    failed = {}
+    for entry in entries:
+        entry_stats = replace(stats)
+        try:
+            with transaction.atomic():
+                upsert_submissions(
+                    entry.form_uid,
+                    [entry.payload],
+                    force_update=True,
+                    stats=entry_stats,
+                )
+        except Exception as exc:
+            failed[entry.id] = str(exc) or exc.__class__.__name__
+            stats.failed += 1
+        else:
+            for field in ("created", "updated", "unchanged", "skipped"):
+                setattr(stats, field, getattr(entry_stats, field))
+    return failed
@@ -0,0 +1,168 @@
+"""
+Background sync jobs.
+
+The web "Sync Now" action only enqueues a SyncJob row; a run_sync_worker
+process claims queued jobs from the database and runs them, reporting
+progress back onto the row so the page can poll it.
+
+Every progress report is also a heartbeat, and so is every wait between
+retries of a Kobo request. A running job whose worker has been silent for
+SYNC_JOB_STALE_AFTER seconds (the worker died or was killed) is marked
+failed, so "Sync Now" queues a fresh job instead of polling one that will
+never finish. A job marked failed keeps that status even if its worker
+turns out to be alive and finishes later.
+"""
+
+import os
+import socket
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import SyncJob
+
+from .kobo_client import KoboToolboxClient
+from .sync import SyncStats, sync_form
+
+
+STALE_JOB_ERROR = "Worker stopped responding; the sync was abandoned"
+
+
+def fail_stale_jobs() -> int:
+    """
+    Mark running jobs whose worker stopped sending heartbeats as failed.
+
+    Returns:
+        Number of jobs failed
+    """
+    stale_after = timedelta(seconds=getattr(settings, "SYNC_JOB_STALE_AFTER", 900))
+    now = timezone.now()
+    cutoff = now - stale_after
+    # Jobs claimed before heartbeats existed only have date_started.
+    silent = Q(date_heartbeat__lt=cutoff) | Q(
+        date_heartbeat__isnull=True, date_started__lt=cutoff
+    )
+    return SyncJob.objects.filter(silent, status=SyncJob.STATUS_RUNNING).update(
+        status=SyncJob.STATUS_FAILED,
+        error=STALE_JOB_ERROR,
+        date_finished=now,
+    )
+
+
+def enqueue_sync_job(form_uid: str, full: bool = False) -> SyncJob:
+    """
+    Queue a sync for a form, reusing one that is already queued or running.
+
+    Args:
+        form_uid: The unique identifier for the form/asset
+        full: Ignore the sync checkpoint and fetch everything
+
+    Returns:
+        The active SyncJob for the form
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = (
+            SyncJob.objects.select_for_update()
+            .filter(form_uid=form_uid, status__in=SyncJob.ACTIVE_STATUSES)
+            .order_by("date_created")
+            .first()
+        )
+        if job is None:
+            job = SyncJob.objects.create(form_uid=form_uid, full=full)
+    return job
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker: Optional[str] = None) -> Optional[SyncJob]:
+    """
+    Atomically take the oldest queued job and mark it running.
+
+    SKIP LOCKED lets several workers poll the same table without handing
+    the same job out twice. Stale running jobs are failed first.
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        job = (
+            SyncJob.objects.select_for_update(skip_locked=True)
+            .filter(status=SyncJob.STATUS_QUEUED)
+            .order_by("date_created")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = SyncJob.STATUS_RUNNING
+        job.worker = worker or default_worker_name()
+        job.date_started = job.date_heartbeat = timezone.now()
+        job.save(update_fields=["status", "worker", "date_started", "date_heartbeat"])
+    return job
+
+
+def _heartbeat(job: SyncJob) -> None:
+    SyncJob.objects.filter(pk=job.pk, status=SyncJob.STATUS_RUNNING).update(
+        date_heartbeat=timezone.now()
+    )
+
+
+def _record_progress(job: SyncJob, stats: SyncStats) -> None:
+    job.total = stats.total
+    job.processed = stats.processed
+    job.created = stats.created
+    job.updated = stats.updated
+    job.unchanged = stats.unchanged
+    job.skipped = stats.skipped
+    job.date_heartbeat = timezone.now()
+    job.save(
+        update_fields=[
+            "total",
+            "processed",
+            "created",
+            "updated",
+            "unchanged",
+            "skipped",
+            "date_heartbeat",
+        ]
+    )
+
+
+def run_sync_job(job: SyncJob, client: Optional[KoboToolboxClient] = None) -> SyncJob:
+    """
+    Run a claimed job to completion, recording progress and the outcome.
+
+    Existing submissions the job fetches are rewritten when their content
+    changed (unchanged ones are skipped by content hash). Only full jobs,
+    which "Sync Now" queues, fetch the already-synced submissions that
+    may have been edited in Kobo; incremental ones only see new ones.
+
+    Failures are stored on the job rather than raised, so one bad form does
+    not stop the worker.
+    """
+    try:
+        client = client or KoboToolboxClient()
+        client.on_wait = lambda: _heartbeat(job)
+        sync_form(
+            client,
+            job.form_uid,
+            full=job.full,
+            force_update=True,
+            on_progress=lambda stats: _record_progress(job, stats),
+        )
+        job.status = SyncJob.STATUS_SUCCEEDED
+    except Exception as e:
+        job.status = SyncJob.STATUS_FAILED
+        job.error = str(e)
+    job.date_finished = timezone.now()
+    # Only while still running: fail_stale_jobs may have given up on it.
+    finished = SyncJob.objects.filter(
+        pk=job.pk, status=SyncJob.STATUS_RUNNING
+    ).update(status=job.status, error=job.error, date_finished=job.date_finished)
+    if not finished:
+        job.refresh_from_db()
+    return job
@@ -5,12 +5,60 @@ Provides a Python interface to interact with KoboToolbox REST API v2.
 Handles authentication, form metadata retrieval, and submission fetching.
 """
 
+import json
 import os
-from typing import Any, Dict, List, Optional
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urljoin
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from api import fastjson
+
+from .resilience import CircuitBreaker, RetryPolicy, TokenBucket, parse_retry_after
+
+
+# Kobo assigns _id in insertion order, so sorting on it gives stable paging.
+ID_ASCENDING = {"_id": 1}
+
+# Submissions requested per page when paginating a whole form.
+PAGE_SIZE = 1000
+
+# Longest single sleep while waiting to retry, so ``on_wait`` keeps being
+# called during long Retry-After delays.
+WAIT_STEP = 60
+
+# Assets requested per page when listing forms (Kobo's own default is 100).
+ASSET_PAGE_SIZE = 100
+
+# Kobo asset search (``q``) matching surveys with an active deployment.
+DEPLOYED_SURVEYS_QUERY = "asset_type:survey AND deployment__active:true"
+
+# Always requested alongside a field projection: paging, de-duplication and
+# the sync checkpoint all depend on them.
+REQUIRED_FIELDS = ("_id", "_uuid", "_submission_time")
+
+
+def after_id(query: Optional[Dict[str, Any]], last_id: Any) -> Optional[Dict[str, Any]]:
+    """``query`` narrowed to submissions with an _id above ``last_id`` (if set)."""
+    if last_id is None:
+        return query
+    after_last = {"_id": {"$gt": last_id}}
+    if not query:
+        return after_last
+    return {"$and": [query, after_last]}
+
+
+def project_fields(fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """REQUIRED_FIELDS plus ``fields``, without duplicates; None for no projection."""
+    if not fields:
+        return None
+    return list(dict.fromkeys([*REQUIRED_FIELDS, *fields]))
 
 
 class KoboAPIException(Exception):
@@ -19,6 +67,12 @@ class KoboAPIException(Exception):
     pass
 
 
+class KoboCircuitOpenError(KoboAPIException):
+    """Raised without calling Kobo while the circuit breaker is open."""
+
+    pass
+
+
 class KoboToolboxClient:
     """
     Client for interacting with KoboToolbox API.
@@ -34,6 +88,11 @@ class KoboToolboxClient:
         token: Optional[str] = None,
         base_url: Optional[str] = None,
         timeout: int = 30,
+        max_connections: int = 10,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        on_wait: Optional[Callable[[], None]] = None,
     ):
         """
         Initialize KoboToolbox API client.
@@ -42,12 +101,25 @@ class KoboToolboxClient:
             token: API token from KoboToolbox. If None, reads from KOBO_TOKEN env var.
             base_url: Base URL for Kobo API. If None, reads from KOBO_BASE_URL env var.
             timeout: Request timeout in seconds (default 30).
+            max_connections: Keep-alive connections pooled per host (default 10).
+                Should be at least the concurrency used for page fetches.
+            retry_policy: Backoff for 429, 5xx and connection errors
+                (default RetryPolicy(); RetryPolicy(max_retries=0) disables).
+            rate_limiter: Optional TokenBucket throttling outgoing requests.
+            circuit_breaker: Fails fast after repeated failures
+                (default CircuitBreaker()).
+            on_wait: Called at least every WAIT_STEP seconds while waiting
+                to retry a request (e.g. to send a job heartbeat).
         """
         self.token = token or os.getenv("KOBO_TOKEN", "")
         self.base_url = base_url or os.getenv(
             "KOBO_BASE_URL", "https://kf.kobotoolbox.org"
         )
         self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.on_wait = on_wait
 
         if not self.token:
             raise ValueError(
@@ -55,6 +127,9 @@ class KoboToolboxClient:
             )
 
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update(
             {
                 "Authorization": f"Token {self.token}",
@@ -66,6 +141,13 @@ class KoboToolboxClient:
         """
         Make HTTP request to Kobo API.
 
+        429, 5xx and connection errors are retried per ``retry_policy``,
+        honouring Retry-After, so a transient failure only repeats this one
+        request. Requests wait for ``rate_limiter`` and fail fast while
+        ``circuit_breaker`` is open. The breaker is checked before the first
+        attempt only and sees one failure per request, once its retries are
+        used up, so a request's own retries never open the circuit under it.
+
         Args:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint path (e.g., '/api/v2/assets/')
@@ -75,32 +157,142 @@ class KoboToolboxClient:
             JSON response as dictionary
 
         Raises:
+            KoboCircuitOpenError: If the circuit breaker is open
             KoboAPIException: If request fails or returns error status
         """
         url = urljoin(self.base_url, endpoint)
+        attempt = 0
 
-        try:
-            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.HTTPError as e:
-            raise KoboAPIException(
-                f"HTTP {response.status_code}: {response.text}"
-            ) from e
-        except requests.exceptions.RequestException as e:
-            raise KoboAPIException(f"Request failed: {str(e)}") from e
-        except ValueError as e:
-            raise KoboAPIException(f"Invalid JSON response: {str(e)}") from e
-
-    def get_forms(self) -> List[Dict[str, Any]]:
+        self._check_circuit()
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(
+                    method, url, timeout=self.timeout, **kwargs
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if self.retry_policy.should_retry(attempt):
+                    self._wait(self.retry_policy.compute_delay(attempt))
+                    attempt += 1
+                    continue
+                self.circuit_breaker.record_failure()
+                raise KoboAPIException(f"Request failed: {str(e)}") from e
+            except requests.exceptions.RequestException as e:
+                self.circuit_breaker.record_failure()
+                raise KoboAPIException(f"Request failed: {str(e)}") from e
+
+            if (
+                response.status_code in self.retry_policy.retry_statuses
+                and self.retry_policy.should_retry(attempt)
+            ):
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self._wait(self.retry_policy.compute_delay(attempt, retry_after))
+                attempt += 1
+                continue
+
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                # Kobo answered, even if it is throttling us (429).
+                self.circuit_breaker.record_success()
+
+            try:
+                response.raise_for_status()
+                return fastjson.loads(response.content)
+            except requests.exceptions.HTTPError as e:
+                raise KoboAPIException(
+                    f"HTTP {response.status_code}: {response.text}"
+                ) from e
+            except ValueError as e:
+                raise KoboAPIException(f"Invalid JSON response: {str(e)}") from e
+
+    def _wait(self, delay: float) -> None:
+        # Sleep in steps, calling on_wait before each one.
+        while True:
+            if self.on_wait:
+                self.on_wait()
+            step = min(delay, WAIT_STEP)
+            time.sleep(step)
+            delay -= step
+            if delay <= 0:
+                return
+
+    def _check_circuit(self) -> None:
+        if not self.circuit_breaker.allow_request():
+            raise KoboCircuitOpenError(
+                "Kobo API circuit open after repeated failures; "
+                f"retrying in {self.circuit_breaker.retry_in:.0f}s"
+            )
+
+    def iter_forms(
+        self,
+        deployed_only: bool = False,
+        page_size: int = ASSET_PAGE_SIZE,
+        concurrency: int = 1,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every form/asset accessible to the authenticated user.
+
+        The first page reports the total, so with ``concurrency`` above 1 the
+        remaining offsets are fetched in parallel; otherwise the ``next``
+        links are followed one page at a time.
+
+        Args:
+            deployed_only: Only surveys with an active deployment, filtered
+                by Kobo (``q`` parameter) rather than locally
+            page_size: Assets requested per page
+            concurrency: Number of pages fetched in parallel
+
+        Yields:
+            Form metadata dictionaries
+        """
+        params = self._asset_params(deployed_only, page_size, offset=0)
+        response = self._make_request("GET", "/api/v2/assets/", params=params)
+        yield from response.get("results", [])
+
+        if concurrency > 1 and response.get("count") is not None:
+            offsets = range(page_size, response["count"], page_size)
+
+            def fetch_page(offset: int) -> List[Dict[str, Any]]:
+                page = self._make_request(
+                    "GET",
+                    "/api/v2/assets/",
+                    params=self._asset_params(deployed_only, page_size, offset),
+                )
+                return page.get("results", [])
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for page in executor.map(fetch_page, offsets):
+                    yield from page
+            return
+
+        next_url = response.get("next")
+        while next_url:
+            # ``next`` is absolute and already carries limit, offset and q.
+            response = self._make_request("GET", next_url)
+            yield from response.get("results", [])
+            next_url = response.get("next")
+
+    def get_forms(
+        self, deployed_only: bool = False, concurrency: int = 1
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve all forms/assets accessible to the authenticated user.
 
+        Follows pagination (see iter_forms), so large accounts get every
+        asset rather than the first page.
+
         Returns:
             List of form metadata dictionaries.
         """
-        response = self._make_request("GET", "/api/v2/assets/")
-        return response.get("results", [])
+        return list(
+            self.iter_forms(deployed_only=deployed_only, concurrency=concurrency)
+        )
 
     def get_form_details(self, form_uid: str) -> Dict[str, Any]:
         """
@@ -115,7 +307,13 @@ class KoboToolboxClient:
         return self._make_request("GET", f"/api/v2/assets/{form_uid}/")
 
     def get_submissions(
-        self, form_uid: str, limit: Optional[int] = None, start: int = 0
+        self,
+        form_uid: str,
+        limit: Optional[int] = None,
+        start: int = 0,
+        query: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, int]] = None,
+        fields: Optional[Iterable[str]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Fetch submissions for a specific form.
@@ -124,11 +322,16 @@ class KoboToolboxClient:
             form_uid: The unique identifier for the form/asset
             limit: Maximum number of submissions to retrieve (None = all)
             start: Starting offset for pagination
+            query: Mongo-style filter, e.g. {"_id": {"$gt": 1200}}
+            sort: Mongo-style sort, e.g. {"_id": 1}
+            fields: Only return these fields (plus REQUIRED_FIELDS), e.g.
+                ["respondent_name", "group_location/district"]
 
         Returns:
             List of submission dictionaries
         """
-        params = {"start": start}
+        params = self._submission_params(query=query, sort=sort, fields=fields)
+        params["start"] = start
         if limit:
             params["limit"] = limit
 
@@ -137,43 +340,195 @@ class KoboToolboxClient:
         )
         return response.get("results", [])
 
-    def get_all_submissions(self, form_uid: str) -> List[Dict[str, Any]]:
+    def iter_submission_pages(
+        self,
+        form_uid: str,
+        page_size: int = PAGE_SIZE,
+        query: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        fields: Optional[Iterable[str]] = None,
+        count: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
         """
-        Fetch all submissions for a form (handles pagination automatically).
+        Yield a form's submissions one page at a time, in _id order.
+
+        Only the pages currently being fetched are held in memory, so the
+        caller can write each page before the next one is consumed. Pages
+        are fetched one after another by keyset (_id above the last one
+        seen), so submissions deleted in Kobo mid-run do not shift later
+        pages past records that were never returned.
 
         Args:
             form_uid: The unique identifier for the form/asset
-
-        Returns:
-            Complete list of all submissions
+            page_size: Submissions requested per page
+            query: Optional Mongo-style filter (see get_submissions)
+            concurrency: Number of pages fetched in parallel. Above 1, page
+                offsets are worked out from the submission count up front and
+                fetched on a thread pool sharing this session, at most
+                ``concurrency`` pages ahead of the consumer. Offsets cannot
+                follow deletions made during the run.
+            fields: Optional field projection (see get_submissions)
+            count: Number of matching submissions, when the caller already
+                asked get_submission_count (saves the parallel path a request)
+
+        Yields:
+            Lists of submission dictionaries
         """
-        all_submissions = []
-        start = 0
-        limit = 1000  # Fetch in batches of 1000
+        if concurrency > 1:
+            yield from self._iter_submission_pages_parallel(
+                form_uid, page_size, query, concurrency, fields, count
+            )
+            return
 
+        last_id = None
         while True:
-            batch = self.get_submissions(form_uid, limit=limit, start=start)
+            batch = self.get_submissions(
+                form_uid,
+                limit=page_size,
+                query=after_id(query, last_id),
+                sort=ID_ASCENDING,
+                fields=fields,
+            )
             if not batch:
                 break
-            all_submissions.extend(batch)
-            start += limit
+            yield batch
             # If we got fewer than limit, we've reached the end
-            if len(batch) < limit:
+            if len(batch) < page_size:
                 break
+            last_id = batch[-1]["_id"]
+
+    def _iter_submission_pages_parallel(
+        self,
+        form_uid: str,
+        page_size: int,
+        query: Optional[Dict[str, Any]],
+        concurrency: int,
+        fields: Optional[Iterable[str]] = None,
+        count: Optional[int] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        total = count
+        if total is None:
+            total = self.get_submission_count(form_uid, query=query)
+        offsets = iter(range(0, total, page_size))
+
+        def fetch_page(start: int) -> List[Dict[str, Any]]:
+            return self.get_submissions(
+                form_uid,
+                limit=page_size,
+                start=start,
+                query=query,
+                sort=ID_ASCENDING,
+                fields=fields,
+            )
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending: Deque[Future] = deque()
+        try:
+            for start in islice(offsets, concurrency):
+                pending.append(executor.submit(fetch_page, start))
+            # Yield pages in offset order, topping the window back up as each
+            # one is handed to the consumer.
+            while pending:
+                page = pending.popleft().result()
+                for start in islice(offsets, 1):
+                    pending.append(executor.submit(fetch_page, start))
+                if page:
+                    yield page
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def iter_submissions(
+        self,
+        form_uid: str,
+        page_size: int = PAGE_SIZE,
+        query: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a form's submissions one at a time, in _id order.
 
-        return all_submissions
+        Arguments are the same as iter_submission_pages.
+        """
+        for page in self.iter_submission_pages(
+            form_uid,
+            page_size=page_size,
+            query=query,
+            concurrency=concurrency,
+            fields=fields,
+        ):
+            yield from page
+
+    def get_all_submissions(
+        self,
+        form_uid: str,
+        query: Optional[Dict[str, Any]] = None,
+        concurrency: int = 1,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch all submissions for a form (handles pagination automatically).
+
+        Prefer iter_submissions for large forms; this holds every submission
+        in memory at once.
+
+        Args:
+            form_uid: The unique identifier for the form/asset
+            query: Optional Mongo-style filter (see get_submissions)
+            concurrency: Number of pages fetched in parallel
+            fields: Optional field projection (see get_submissions)
+
+        Returns:
+            Complete list of all submissions, in _id order
+        """
+        return list(
+            self.iter_submissions(
+                form_uid, query=query, concurrency=concurrency, fields=fields
+            )
+        )
 
-    def get_submission_count(self, form_uid: str) -> int:
+    def get_submission_count(
+        self, form_uid: str, query: Optional[Dict[str, Any]] = None
+    ) -> int:
         """
         Get the total number of submissions for a form.
 
         Args:
             form_uid: The unique identifier for the form/asset
+            query: Optional Mongo-style filter (see get_submissions)
 
         Returns:
             Total count of submissions
         """
+        params = self._submission_params(query=query)
+        params["limit"] = 1
         response = self._make_request(
-            "GET", f"/api/v2/assets/{form_uid}/data/", params={"limit": 1}
+            "GET", f"/api/v2/assets/{form_uid}/data/", params=params
         )
         return response.get("count", 0)
+
+    @staticmethod
+    def _asset_params(
+        deployed_only: bool, page_size: int, offset: int
+    ) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"limit": page_size, "offset": offset}
+        if deployed_only:
+            params["q"] = DEPLOYED_SURVEYS_QUERY
+        return params
+
+    @staticmethod
+    def _submission_params(
+        query: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, int]] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """Encode the JSON-valued query parameters of the data endpoint."""
+        params: Dict[str, Any] = {}
+        if query:
+            params["query"] = json.dumps(query)
+        if sort:
+            params["sort"] = json.dumps(sort)
+        projection = project_fields(fields)
+        if projection:
+            params["fields"] = json.dumps(projection)
+        return params
@@ -0,0 +1,88 @@
+"""
+Per-form sync locks.
+
+Two syncs of the same form would fetch the same pages and race on the same
+rows and checkpoint, so every sync holds a named database lock for its form.
+The lock lives in the database, so it also works across processes and hosts.
+MySQL uses GET_LOCK and PostgreSQL uses an advisory lock. Both are tied to the
+connection and go away if the process dies. Other backends, such as SQLite
+in development, fall back to an in-process lock.
+"""
+
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Set
+
+from django.db import connection
+
+LOCK_PREFIX = "kobo_sync:"
+
+_local_locks: Set[str] = set()
+_local_guard = threading.Lock()
+
+
+class FormLockedError(Exception):
+    """Raised when another sync already holds the form's lock."""
+
+    pass
+
+
+def _lock_name(form_uid: str) -> str:
+    # MySQL lock names are limited to 64 characters.
+    name = f"{LOCK_PREFIX}{form_uid}"
+    if len(name) > 64:
+        name = LOCK_PREFIX + hashlib.sha1(form_uid.encode()).hexdigest()
+    return name
+
+
+def _advisory_key(name: str) -> int:
+    return int.from_bytes(hashlib.sha1(name.encode()).digest()[:8], "big", signed=True)
+
+
+def acquire_form_lock(form_uid: str) -> None:
+    """
+    Take the form's sync lock without waiting.
+
+    Raises:
+        FormLockedError: another sync holds the lock
+    """
+    name = _lock_name(form_uid)
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", [name])
+            acquired = cursor.fetchone()[0] == 1
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [_advisory_key(name)])
+            acquired = bool(cursor.fetchone()[0])
+    else:
+        with _local_guard:
+            acquired = name not in _local_locks
+            _local_locks.add(name)
+    if not acquired:
+        raise FormLockedError(f"Form {form_uid} is already being synced")
+
+
+def release_form_lock(form_uid: str) -> None:
+    """Release a lock taken with acquire_form_lock (on the same connection)."""
+    name = _lock_name(form_uid)
+    if connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", [name])
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [_advisory_key(name)])
+    else:
+        with _local_guard:
+            _local_locks.discard(name)
+
+
+@contextmanager
+def form_lock(form_uid: str) -> Iterator[None]:
+    """Hold the form's sync lock for the duration of the block."""
+    acquire_form_lock(form_uid)
+    try:
+        yield
+    finally:
+        release_form_lock(form_uid)
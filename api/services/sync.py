@@ -0,0 +1,657 @@
+"""
+Submission sync helpers.
+
+Shared write path for everything that stores Kobo submissions locally
+(the fetch_kobo_data command, the web "Sync Now" action and the webhook),
+so every entry point builds rows the same way.
+
+Pulls from Kobo are recorded as SyncRuns: each page is committed together
+with the run's progress, so an interrupted run can be resumed. A pull holds
+the form's sync lock (see locks.py), so one form is never synced twice at once.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, fields as dataclass_fields, replace
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.answers import replace_answers
+from api.display import build_display
+from api.models import KoboSubmission, SyncCheckpoint, SyncRun
+from api.page_cache import invalidate_forms
+from api.schemas import Schema, get_schema, schema_lookup, submission_version
+from api.search import build_search_text
+
+from .kobo_client import ID_ASCENDING
+from .locks import acquire_form_lock, form_lock, release_form_lock
+
+DEFAULT_BATCH_SIZE = 500
+
+# Columns derived from ``data`` on every write (see build_derived_fields).
+DERIVED_FIELDS = ["search_text", "content_hash", "display_fields", "preview"]
+
+# Columns rewritten when an existing submission is updated in bulk.
+UPDATE_FIELDS = ["form_uid", "data", "date_submitted", "date_updated"] + DERIVED_FIELDS
+
+
+@dataclass
+class SyncStats:
+    """Running counters for a sync."""
+
+    created: int = 0
+    updated: int = 0
+    # Existing submissions whose content hash matched, so nothing was written.
+    unchanged: int = 0
+    skipped: int = 0
+    # Inbox entries that could not be written (see WebhookInbox.error).
+    failed: int = 0
+    # Submissions Kobo reported as matching, when known up front.
+    total: Optional[int] = None
+    # High-water mark of everything seen, used to advance the SyncCheckpoint.
+    last_submission_id: Optional[int] = None
+    last_submission_time: Optional[datetime] = None
+
+    @property
+    def processed(self) -> int:
+        return self.created + self.updated + self.unchanged + self.skipped
+
+    def observe(
+        self, submission: Dict[str, Any], submitted: Optional[datetime]
+    ) -> None:
+        """Track the newest _id and _submission_time seen."""
+        try:
+            submission_id = int(submission["_id"])
+        except (KeyError, TypeError, ValueError):
+            submission_id = None
+        if submission_id is not None and (
+            self.last_submission_id is None or submission_id > self.last_submission_id
+        ):
+            self.last_submission_id = submission_id
+        if submitted is not None and (
+            self.last_submission_time is None or submitted > self.last_submission_time
+        ):
+            self.last_submission_time = submitted
+
+
+def parse_submission_time(value: Optional[str]) -> datetime:
+    """
+    Parse Kobo's ``_submission_time`` into an aware datetime.
+
+    Kobo reports UTC, either with a trailing ``Z`` or without any offset,
+    so naive values are treated as UTC. Falls back to now() when missing
+    or unparseable.
+    """
+    if not value:
+        return timezone.now()
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return timezone.now()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=dt_timezone.utc)
+    return dt
+
+
+def compute_content_hash(payload: Dict[str, Any]) -> str:
+    """
+    SHA-256 of the payload as canonical JSON.
+
+    Keys are sorted and whitespace is fixed, so the same submission always
+    hashes the same regardless of the key order Kobo sends it in.
+    """
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def build_derived_fields(
+    payload: Dict[str, Any], schema: Optional[Schema] = None
+) -> Dict[str, Any]:
+    """
+    Values of DERIVED_FIELDS, precomputed from a submission payload.
+
+    ``schema`` supplies question and choice labels for the display columns;
+    without one, labels are derived from the answer keys.
+    """
+    return {
+        "search_text": build_search_text(payload),
+        "content_hash": compute_content_hash(payload),
+        **build_display(payload, schema),
+    }
+
+
+def build_submission_fields(
+    form_uid: str, payload: Dict[str, Any], schema: Optional[Schema] = None
+) -> Dict[str, Any]:
+    """Build the KoboSubmission column values for a raw Kobo payload."""
+    return {
+        "form_uid": form_uid,
+        "data": payload,
+        "date_submitted": parse_submission_time(payload.get("_submission_time")),
+        **build_derived_fields(payload, schema),
+    }
+
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def upsert_submissions(
+    form_uid: str,
+    submissions: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force_update: bool = False,
+    stats: Optional[SyncStats] = None,
+    merge: bool = False,
+) -> SyncStats:
+    """
+    Insert or update submissions in batches.
+
+    Each batch costs one SELECT to find which UUIDs already exist (and their
+    content hashes), then one bulk INSERT for new rows and (with
+    ``force_update``) one bulk UPDATE for existing rows whose content
+    changed, instead of a SELECT plus a write per submission. Rows whose hash
+    matches are counted as unchanged and not written at all.
+
+    Args:
+        form_uid: Form the submissions belong to
+        submissions: Iterable of raw Kobo submission dictionaries
+        batch_size: Number of submissions written per batch
+        force_update: Update submissions that already exist locally when
+            their content changed
+        stats: Counters to accumulate into (a new SyncStats if None)
+        merge: The submissions are partial (a field projection); lay their
+            keys over the stored ``data`` of existing rows instead of
+            replacing it
+
+    Returns:
+        The updated SyncStats
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+
+    stats = stats if stats is not None else SyncStats()
+    for batch in _chunked(submissions, batch_size):
+        _upsert_batch(form_uid, batch, force_update, stats, merge)
+    return stats
+
+
+def _upsert_batch(
+    form_uid: str,
+    batch: List[Dict[str, Any]],
+    force_update: bool,
+    stats: SyncStats,
+    merge: bool = False,
+) -> None:
+    # Key by UUID so a submission repeated within one batch is written once,
+    # with the last payload winning.
+    rows: Dict[str, Dict[str, Any]] = {}
+    for submission in batch:
+        uuid = submission.get("_uuid")
+        if not uuid:
+            stats.skipped += 1
+            continue
+        if uuid in rows:
+            stats.skipped += 1
+        rows[uuid] = submission
+
+    if not rows:
+        return
+
+    existing = {
+        uuid: (pk, content_hash)
+        for uuid, pk, content_hash in KoboSubmission.objects.filter(
+            uuid__in=list(rows)
+        ).values_list("uuid", "id", "content_hash")
+    }
+    if merge and force_update and existing:
+        # A projected page only carries some answers; keep the rest of what
+        # is stored rather than hashing (and writing) the partial payload.
+        stored = dict(
+            KoboSubmission.objects.filter(uuid__in=list(existing)).values_list(
+                "uuid", "data"
+            )
+        )
+        for uuid, data in stored.items():
+            if isinstance(data, dict):
+                rows[uuid] = {**data, **rows[uuid]}
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    observed = []
+    schema_for = schema_lookup()
+    for uuid, submission in rows.items():
+        fields = build_submission_fields(
+            form_uid, submission, schema_for(form_uid, submission)
+        )
+        observed.append(
+            (
+                submission,
+                fields["date_submitted"] if submission.get("_submission_time") else None,
+            )
+        )
+        if uuid not in existing:
+            to_create.append(KoboSubmission(uuid=uuid, **fields))
+            continue
+        pk, content_hash = existing[uuid]
+        if not force_update:
+            stats.skipped += 1
+        elif content_hash == fields["content_hash"]:
+            stats.unchanged += 1
+        else:
+            to_update.append(
+                KoboSubmission(id=pk, uuid=uuid, date_updated=now, **fields)
+            )
+
+    with transaction.atomic():
+        if to_create:
+            # A webhook may insert the same UUID between our SELECT and this
+            # INSERT; upsert on conflict instead of failing the whole batch.
+            KoboSubmission.objects.bulk_create(
+                to_create,
+                update_conflicts=True,
+                unique_fields=_conflict_target(),
+                update_fields=UPDATE_FIELDS,
+            )
+        if to_update:
+            KoboSubmission.objects.bulk_update(to_update, UPDATE_FIELDS)
+        _replace_batch_answers(form_uid, to_create, to_update)
+        if to_create or to_update:
+            # Bulk writes send no model signals; drop cached pages explicitly.
+            invalidate_forms([form_uid])
+
+    stats.created += len(to_create)
+    stats.updated += len(to_update)
+    # Only move the high-water mark once the batch is safely written.
+    for submission, submitted in observed:
+        stats.observe(submission, submitted)
+
+
+def _replace_batch_answers(
+    form_uid: str,
+    created: List[KoboSubmission],
+    updated: List[KoboSubmission],
+) -> None:
+    written = created + updated
+    if not written:
+        return
+    ids: Dict[str, int] = {}
+    if created:
+        # bulk_create does not return primary keys on MySQL, so look them up.
+        ids = dict(
+            KoboSubmission.objects.filter(
+                uuid__in=[submission.uuid for submission in created]
+            ).values_list("uuid", "id")
+        )
+    replace_answers(
+        (submission.pk or ids[submission.uuid], form_uid, submission.data)
+        for submission in written
+    )
+
+
+def _conflict_target() -> Optional[List[str]]:
+    # MySQL's ON DUPLICATE KEY UPDATE cannot name the conflicting column.
+    if connection.features.supports_update_conflicts_with_target:
+        return ["uuid"]
+    return None
+
+
+def save_submission(form_uid: str, payload: Dict[str, Any]) -> str:
+    """
+    Create or update one submission (the synchronous webhook path).
+
+    Returns:
+        "created", "updated", or "unchanged" when the stored content hash
+        already matches and nothing was written
+    """
+    schema = get_schema(form_uid, submission_version(payload))
+    fields = build_submission_fields(form_uid, payload, schema)
+    uuid = payload["_uuid"]
+    current = (
+        KoboSubmission.objects.filter(uuid=uuid)
+        .values_list("content_hash", flat=True)
+        .first()
+    )
+    if current == fields["content_hash"]:
+        return "unchanged"
+    return _write_submission(uuid, form_uid, fields)
+
+
+async def asave_submission(form_uid: str, payload: Dict[str, Any]) -> str:
+    """
+    save_submission for async views.
+
+    The unchanged check uses the async ORM; the write itself spans a
+    transaction (submission plus answers), so it goes through sync_to_async.
+    """
+    schema = await sync_to_async(get_schema)(form_uid, submission_version(payload))
+    fields = build_submission_fields(form_uid, payload, schema)
+    uuid = payload["_uuid"]
+    current = await (
+        KoboSubmission.objects.filter(uuid=uuid)
+        .values_list("content_hash", flat=True)
+        .afirst()
+    )
+    if current == fields["content_hash"]:
+        return "unchanged"
+    return await sync_to_async(_write_submission)(uuid, form_uid, fields)
+
+
+def _write_submission(uuid: str, form_uid: str, fields: Dict[str, Any]) -> str:
+    with transaction.atomic():
+        submission, created = KoboSubmission.objects.update_or_create(
+            uuid=uuid, defaults=fields
+        )
+        replace_answers([(submission.pk, form_uid, fields["data"])])
+    return "created" if created else "updated"
+
+
+def get_checkpoint_query(form_uid: str) -> Optional[Dict[str, Any]]:
+    """Kobo query for submissions newer than the form's checkpoint, if any."""
+    checkpoint = SyncCheckpoint.objects.filter(form_uid=form_uid).first()
+    return checkpoint.build_query() if checkpoint else None
+
+
+def advance_checkpoint(form_uid: str, stats: SyncStats) -> SyncCheckpoint:
+    """Move the form's checkpoint forward to the newest submission in stats."""
+    with transaction.atomic():
+        checkpoint, _ = SyncCheckpoint.objects.select_for_update().get_or_create(
+            form_uid=form_uid
+        )
+        if stats.last_submission_id is not None and (
+            checkpoint.last_submission_id is None
+            or stats.last_submission_id > checkpoint.last_submission_id
+        ):
+            checkpoint.last_submission_id = stats.last_submission_id
+        if stats.last_submission_time is not None and (
+            checkpoint.last_submission_time is None
+            or stats.last_submission_time > checkpoint.last_submission_time
+        ):
+            checkpoint.last_submission_time = stats.last_submission_time
+        checkpoint.save()
+    return checkpoint
+
+
+def get_sync_fields(form_uid: str) -> Optional[List[str]]:
+    """The form's Kobo field projection from settings.KOBO_SYNC_FIELDS, if any."""
+    configured = getattr(settings, "KOBO_SYNC_FIELDS", {})
+    if configured.get(form_uid):
+        return list(configured[form_uid])
+    return None
+
+
+def start_sync_run(form_uid: str, full: bool = False, resume: bool = False) -> SyncRun:
+    """
+    Open a SyncRun for the form, or reopen its last one with ``resume``.
+
+    Raises:
+        SyncRun.DoesNotExist: ``resume`` was requested but the form's most
+            recent run already completed (or there is none)
+    """
+    if resume:
+        run = SyncRun.objects.filter(form_uid=form_uid).first()
+        if run is None or run.status not in SyncRun.INCOMPLETE_STATUSES:
+            raise SyncRun.DoesNotExist(f"No incomplete sync run for form {form_uid}")
+        run.status = SyncRun.STATUS_RUNNING
+        run.error = ""
+        run.date_finished = None
+        run.save(update_fields=["status", "error", "date_finished"])
+        return run
+
+    query = None if full else get_checkpoint_query(form_uid)
+    return SyncRun.objects.create(form_uid=form_uid, query=query)
+
+
+def run_stats(run: SyncRun) -> SyncStats:
+    """SyncStats seeded with what a (possibly resumed) run already committed."""
+    return SyncStats(
+        created=run.created,
+        updated=run.updated,
+        unchanged=run.unchanged,
+        skipped=run.skipped,
+        last_submission_id=run.last_submission_id,
+    )
+
+
+def commit_page(
+    run: SyncRun,
+    page: List[Dict[str, Any]],
+    stats: SyncStats,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force_update: bool = False,
+    merge: bool = False,
+) -> None:
+    """
+    Write one page and record it on the run in a single transaction.
+
+    ``stats`` only takes in the page once it is committed: a batch failing
+    partway through rolls back the whole page, and the checkpoint must not
+    move past the rows of its earlier batches.
+    """
+    page_stats = replace(stats)
+    with transaction.atomic():
+        upsert_submissions(
+            run.form_uid,
+            page,
+            batch_size=batch_size,
+            force_update=force_update,
+            stats=page_stats,
+            merge=merge,
+        )
+        run.last_submission_id = page_stats.last_submission_id
+        run.pages_committed += 1
+        run.created = page_stats.created
+        run.updated = page_stats.updated
+        run.unchanged = page_stats.unchanged
+        run.skipped = page_stats.skipped
+        run.save(
+            update_fields=[
+                "last_submission_id",
+                "pages_committed",
+                "created",
+                "updated",
+                "unchanged",
+                "skipped",
+            ]
+        )
+    for field in dataclass_fields(SyncStats):
+        setattr(stats, field.name, getattr(page_stats, field.name))
+
+
+def finish_run(run: SyncRun, error: Optional[str] = None) -> None:
+    """Mark the run completed, or failed with ``error``."""
+    run.status = SyncRun.STATUS_FAILED if error else SyncRun.STATUS_COMPLETED
+    run.error = error or ""
+    run.date_finished = timezone.now()
+    run.save(update_fields=["status", "error", "date_finished"])
+
+
+def sync_form(
+    client,
+    form_uid: str,
+    full: bool = False,
+    limit: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force_update: bool = False,
+    concurrency: int = 1,
+    on_progress: Optional[Callable[[SyncStats], None]] = None,
+    resume: bool = False,
+    fields: Optional[List[str]] = None,
+) -> SyncStats:
+    """
+    Pull a form's submissions from Kobo and write them page by page.
+
+    Incremental unless ``full`` is set: only submissions past the form's
+    SyncCheckpoint are requested. Each page is committed together with the
+    SyncRun's last _id, and the checkpoint is advanced to whatever was
+    written even when a later page fails, because pages arrive in _id order.
+
+    Args:
+        client: KoboToolboxClient used for fetching
+        form_uid: The unique identifier for the form/asset
+        full: Ignore the checkpoint and fetch every submission
+        limit: Only fetch the first ``limit`` matching submissions
+        batch_size: Number of submissions written per database batch
+        force_update: Update submissions that already exist locally when
+            their content changed
+        concurrency: Number of pages fetched from Kobo in parallel
+        on_progress: Called with the running SyncStats once the total is
+            known and after every page is written
+        resume: Continue the form's last incomplete SyncRun after its last
+            committed page instead of starting a new run
+        fields: Only fetch these submission fields from Kobo (the _id,
+            _uuid and _submission_time are always included); defaults to
+            the form's KOBO_SYNC_FIELDS entry. New submissions then store
+            only the projected fields; existing ones keep their other
+            answers, with the projected ones updated.
+
+    Returns:
+        SyncStats for the run (including pages committed before a resume)
+
+    Raises:
+        FormLockedError: another sync of this form is running
+        SyncRun.DoesNotExist: ``resume`` was set but there is nothing to resume
+    """
+    with form_lock(form_uid):
+        run = start_sync_run(form_uid, full=full, resume=resume)
+        query = run.resume_query()
+        stats = run_stats(run)
+        fields = fields or get_sync_fields(form_uid)
+
+        try:
+            if limit:
+                pages = [
+                    client.get_submissions(
+                        form_uid,
+                        limit=limit,
+                        query=query,
+                        sort=ID_ASCENDING,
+                        fields=fields,
+                    )
+                ]
+                stats.total = stats.processed + len(pages[0])
+            else:
+                count = client.get_submission_count(form_uid, query=query)
+                stats.total = stats.processed + count
+                pages = client.iter_submission_pages(
+                    form_uid,
+                    query=query,
+                    concurrency=concurrency,
+                    fields=fields,
+                    count=count,
+                )
+            if on_progress:
+                on_progress(stats)
+
+            for page in pages:
+                commit_page(
+                    run,
+                    page,
+                    stats,
+                    batch_size=batch_size,
+                    force_update=force_update,
+                    merge=bool(fields),
+                )
+                if on_progress:
+                    on_progress(stats)
+        except Exception as exc:
+            finish_run(run, error=str(exc))
+            raise
+        else:
+            finish_run(run)
+        finally:
+            advance_checkpoint(form_uid, stats)
+        return stats
+
+
+async def async_sync_form(
+    client,
+    form_uid: str,
+    full: bool = False,
+    limit: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force_update: bool = False,
+    concurrency: int = 1,
+    on_progress: Optional[Callable[[SyncStats], None]] = None,
+    resume: bool = False,
+    fields: Optional[List[str]] = None,
+) -> SyncStats:
+    """
+    sync_form for an AsyncKoboToolboxClient.
+
+    HTTP requests run on the event loop; database access goes through
+    sync_to_async, as the ORM cannot be called from async code directly.
+    That runs on one thread, so the form lock is taken and released on the
+    same database connection.
+    """
+    await sync_to_async(acquire_form_lock)(form_uid)
+    try:
+        run = await sync_to_async(start_sync_run)(form_uid, full=full, resume=resume)
+        query = run.resume_query()
+        stats = run_stats(run)
+        fields = fields or get_sync_fields(form_uid)
+        commit = sync_to_async(commit_page)
+
+        async def write(page):
+            await commit(
+                run,
+                page,
+                stats,
+                batch_size=batch_size,
+                force_update=force_update,
+                merge=bool(fields),
+            )
+            if on_progress:
+                on_progress(stats)
+
+        try:
+            if limit:
+                page = await client.get_submissions(
+                    form_uid,
+                    limit=limit,
+                    query=query,
+                    sort=ID_ASCENDING,
+                    fields=fields,
+                )
+                stats.total = stats.processed + len(page)
+                if on_progress:
+                    on_progress(stats)
+                await write(page)
+            else:
+                count = await client.get_submission_count(form_uid, query=query)
+                stats.total = stats.processed + count
+                if on_progress:
+                    on_progress(stats)
+                async for page in client.iter_submission_pages(
+                    form_uid,
+                    query=query,
+                    concurrency=concurrency,
+                    fields=fields,
+                    count=count,
+                ):
+                    await write(page)
+        except Exception as exc:
+            await sync_to_async(finish_run)(run, error=str(exc))
+            raise
+        else:
+            await sync_to_async(finish_run)(run)
+        finally:
+            await sync_to_async(advance_checkpoint)(form_uid, stats)
+        return stats
+    finally:
+        # Same thread as the acquire, so the lock's connection is released.
+        await sync_to_async(release_form_lock)(form_uid)
@@ -7,19 +7,21 @@ from datetime import timezone as dt_timezone
 from zoneinfo import ZoneInfo
 from django.utils import timezone
 
+from api.display import field_label
+
 register = template.Library()
 
 
 @register.filter(name="readable_field")
-def readable_field(value):
+def readable_field(value, schema=None):
     """
     Convert field names to human-readable format.
+    Uses the question label from the form schema when one is given.
     Example: 'first_name' -> 'First Name'
     """
     if not value:
         return value
-    # Replace underscores with spaces and title case
-    return str(value).replace("_", " ").title()
+    return field_label(str(value), schema)
 
 
 @register.filter(name="is_list")
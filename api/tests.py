@@ -1,12 +1,71 @@
-from datetime import datetime
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
 
+import httpx
+import requests
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
-from .models import KoboSubmission
+from .admin import KoboSubmissionAdmin
+from .display import build_display
+from .fastjson import FastJSONParser, FastJSONRenderer
+from .json_indexes import (
+    JsonIndex,
+    clear_column_cache,
+    diff_indexes,
+    existing_columns,
+    registered_indexes,
+)
+from .models import KoboSubmission, SubmissionAnswer, SyncJob, SyncRun, WebhookInbox
+from .pagination import keyset_paginate
+from .schemas import clear_schema_cache, get_schema, save_schema
+from .search import build_search_text
+from .services import (
+    AsyncKoboToolboxClient,
+    KoboToolboxClient,
+    SyncStats,
+    upsert_submissions,
+)
+from .services import sync as sync_module
+from .services.forms import get_cached_forms
+from .services.inbox import drain_inbox, enqueue_webhook
+from .services.jobs import claim_next_job, enqueue_sync_job, run_sync_job
+from .services.kobo_client import KoboAPIException, KoboCircuitOpenError
+from .services.locks import FormLockedError
+from .services.resilience import CircuitBreaker, RetryPolicy, TokenBucket
+from .services.sync import (
+    advance_checkpoint,
+    compute_content_hash,
+    get_checkpoint_query,
+    sync_form,
+)
+
+# Keep the file-based default cache out of the working tree, and every run
+# starting empty.
+_test_cache = override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+
+
+def setUpModule():
+    _test_cache.enable()
+
+
+def tearDownModule():
+    _test_cache.disable()
 
 
 class HealthCheckViewTests(APITestCase):
@@ -52,6 +111,10 @@ class KoboWebhookViewTests(APITestCase):
         submission = KoboSubmission.objects.get(uuid="test-uuid-12345")
         self.assertEqual(submission.form_uid, "test-form-uid")
         self.assertEqual(submission.data, self.sample_payload)
+        self.assertEqual(
+            set(submission.answers.values_list("field_path", flat=True)),
+            {"respondent_name", "survey_response"},
+        )
 
     def test_webhook_updates_existing_submission(self):
         # Create initial submission
@@ -75,6 +138,18 @@ class KoboWebhookViewTests(APITestCase):
         submission = KoboSubmission.objects.get(uuid="test-uuid-12345")
         self.assertEqual(submission.data["survey_response"], "Updated answer")
 
+    def test_webhook_skips_unchanged_submission(self):
+        self.client.post(self.url, self.sample_payload, format="json")
+        before = KoboSubmission.objects.get(uuid="test-uuid-12345").date_updated
+
+        response = self.client.post(self.url, self.sample_payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["action"], "unchanged")
+        self.assertEqual(
+            KoboSubmission.objects.get(uuid="test-uuid-12345").date_updated, before
+        )
+
     def test_webhook_rejects_missing_uuid(self):
         invalid_payload = {"formid": "test-form"}
         response = self.client.post(self.url, invalid_payload, format="json")
@@ -145,3 +220,1374 @@ class KoboSubmissionAPITests(APITestCase):
         )
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["form_uid"], "api-form-001")
+
+
+class UpsertSubmissionsTests(TestCase):
+    def _payload(self, uuid, answer="answer"):
+        return {
+            "_uuid": uuid,
+            "_submission_time": "2025-10-07T12:00:00",
+            "question1": answer,
+        }
+
+    def test_creates_new_and_skips_existing(self):
+        upsert_submissions("form-001", [self._payload("uuid-1")])
+
+        stats = upsert_submissions(
+            "form-001",
+            [self._payload("uuid-1", "changed"), self._payload("uuid-2"), {}],
+            batch_size=1,
+        )
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.updated, 0)
+        self.assertEqual(stats.skipped, 2)
+        self.assertEqual(
+            KoboSubmission.objects.get(uuid="uuid-1").data["question1"], "answer"
+        )
+
+    def test_force_update_rewrites_existing(self):
+        upsert_submissions("form-001", [self._payload("uuid-1")])
+
+        stats = upsert_submissions(
+            "form-001", [self._payload("uuid-1", "changed")], force_update=True
+        )
+
+        self.assertEqual(stats.updated, 1)
+        submission = KoboSubmission.objects.get(uuid="uuid-1")
+        self.assertEqual(submission.data["question1"], "changed")
+        self.assertEqual(submission.date_submitted.year, 2025)
+
+    def test_force_update_skips_unchanged_content(self):
+        upsert_submissions("form-001", [self._payload("uuid-1")])
+        before = KoboSubmission.objects.get(uuid="uuid-1").date_updated
+
+        stats = upsert_submissions(
+            "form-001",
+            [{"question1": "answer", **self._payload("uuid-1")}],
+            force_update=True,
+        )
+
+        self.assertEqual(stats.updated, 0)
+        self.assertEqual(stats.unchanged, 1)
+        self.assertEqual(KoboSubmission.objects.get(uuid="uuid-1").date_updated, before)
+
+    def test_content_hash_ignores_key_order(self):
+        self.assertEqual(
+            compute_content_hash({"a": 1, "b": [1, 2]}),
+            compute_content_hash({"b": [1, 2], "a": 1}),
+        )
+        self.assertNotEqual(
+            compute_content_hash({"a": 1}), compute_content_hash({"a": 2})
+        )
+
+    def test_duplicate_uuid_in_batch_keeps_last_payload(self):
+        stats = upsert_submissions(
+            "form-001",
+            [self._payload("uuid-1", "first"), self._payload("uuid-1", "second")],
+        )
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.skipped, 1)
+        self.assertEqual(
+            KoboSubmission.objects.get(uuid="uuid-1").data["question1"], "second"
+        )
+
+
+class SyncCheckpointTests(TestCase):
+    def test_no_checkpoint_means_full_sync(self):
+        self.assertIsNone(get_checkpoint_query("form-001"))
+
+    def test_advance_checkpoint_only_moves_forward(self):
+        stats = upsert_submissions(
+            "form-001",
+            [
+                {"_uuid": "uuid-1", "_id": 10, "_submission_time": "2025-10-07T12:00:00"},
+                {"_uuid": "uuid-2", "_id": 12, "_submission_time": "2025-10-08T12:00:00"},
+            ],
+        )
+        advance_checkpoint("form-001", stats)
+        self.assertEqual(get_checkpoint_query("form-001"), {"_id": {"$gt": 12}})
+
+        stale = upsert_submissions(
+            "form-001", [{"_uuid": "uuid-0", "_id": 3}]
+        )
+        checkpoint = advance_checkpoint("form-001", stale)
+        self.assertEqual(checkpoint.last_submission_id, 12)
+        self.assertEqual(checkpoint.last_submission_time.day, 8)
+
+
+class SyncRunTests(TestCase):
+    def _failing_pages(self, *args, **kwargs):
+        yield [{"_uuid": "uuid-1", "_id": 1}, {"_uuid": "uuid-2", "_id": 2}]
+        raise KoboAPIException("connection reset")
+
+    def test_failed_run_keeps_committed_pages(self):
+        client = MagicMock()
+        client.get_submission_count.return_value = 4
+        client.iter_submission_pages.side_effect = self._failing_pages
+
+        with self.assertRaises(KoboAPIException):
+            sync_form(client, "form-001", full=True)
+
+        run = SyncRun.objects.get(form_uid="form-001")
+        self.assertEqual(run.status, SyncRun.STATUS_FAILED)
+        self.assertEqual(run.last_submission_id, 2)
+        self.assertEqual(run.pages_committed, 1)
+        self.assertEqual(run.created, 2)
+        self.assertEqual(KoboSubmission.objects.count(), 2)
+
+    def test_failed_batch_does_not_advance_checkpoint(self):
+        client = MagicMock()
+        client.get_submission_count.return_value = 4
+        client.iter_submission_pages.return_value = iter(
+            [[{"_uuid": f"uuid-{i}", "_id": i} for i in range(1, 5)]]
+        )
+        real_upsert_batch = sync_module._upsert_batch
+        calls = []
+
+        def upsert_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("deadlock")
+            return real_upsert_batch(*args, **kwargs)
+
+        with patch("api.services.sync._upsert_batch", side_effect=upsert_batch):
+            with self.assertRaises(RuntimeError):
+                sync_form(client, "form-001", batch_size=2)
+
+        self.assertFalse(KoboSubmission.objects.exists())
+        self.assertIsNone(get_checkpoint_query("form-001"))
+
+    def test_resume_continues_after_last_committed_id(self):
+        client = MagicMock()
+        client.get_submission_count.return_value = 4
+        client.iter_submission_pages.side_effect = self._failing_pages
+        with self.assertRaises(KoboAPIException):
+            sync_form(client, "form-001", full=True)
+
+        client.get_submission_count.return_value = 2
+        client.iter_submission_pages.side_effect = None
+        client.iter_submission_pages.return_value = iter(
+            [[{"_uuid": "uuid-3", "_id": 3}, {"_uuid": "uuid-4", "_id": 4}]]
+        )
+        stats = sync_form(client, "form-001", resume=True)
+
+        self.assertEqual(
+            client.iter_submission_pages.call_args.kwargs["query"],
+            {"_id": {"$gt": 2}},
+        )
+        self.assertEqual(stats.created, 4)
+        self.assertEqual(stats.total, 4)
+        run = SyncRun.objects.get(form_uid="form-001")
+        self.assertEqual(run.status, SyncRun.STATUS_COMPLETED)
+        self.assertEqual(run.pages_committed, 2)
+
+    def test_locked_form_is_not_synced(self):
+        client = MagicMock()
+        with patch(
+            "api.services.locks.acquire_form_lock",
+            side_effect=FormLockedError("Form form-001 is already being synced"),
+        ):
+            with self.assertRaises(FormLockedError):
+                sync_form(client, "form-001")
+
+        client.get_submission_count.assert_not_called()
+        self.assertFalse(SyncRun.objects.exists())
+
+    def test_command_syncs_several_forms(self):
+        stdout = io.StringIO()
+        with patch(
+            "api.management.commands.fetch_kobo_data.KoboToolboxClient"
+        ), patch(
+            "api.management.commands.fetch_kobo_data.sync_form",
+            side_effect=lambda client, form_uid, **kwargs: SyncStats(created=2),
+        ) as mock_sync:
+            call_command(
+                "fetch_kobo_data", "form-001", "form-002", workers=2, stdout=stdout
+            )
+
+        self.assertEqual(
+            sorted(call.args[1] for call in mock_sync.call_args_list),
+            ["form-001", "form-002"],
+        )
+        self.assertIn("All forms: 4 created", stdout.getvalue())
+
+    def test_resume_without_incomplete_run_fails(self):
+        with self.assertRaises(SyncRun.DoesNotExist):
+            sync_form(MagicMock(), "form-001", resume=True)
+
+
+class KoboToolboxClientTests(TestCase):
+    def setUp(self):
+        self.kobo = KoboToolboxClient(token="test-token")
+
+    def test_get_submissions_encodes_query_and_sort(self):
+        with patch.object(
+            self.kobo, "_make_request", return_value={"results": []}
+        ) as mock_request:
+            self.kobo.get_submissions(
+                "form-001", limit=10, query={"_id": {"$gt": 5}}, sort={"_id": 1}
+            )
+
+        params = mock_request.call_args.kwargs["params"]
+        self.assertEqual(params["query"], '{"_id": {"$gt": 5}}')
+        self.assertEqual(params["sort"], '{"_id": 1}')
+        self.assertEqual(params["limit"], 10)
+        self.assertEqual(params["start"], 0)
+
+    def test_get_submissions_projects_fields(self):
+        with patch.object(
+            self.kobo, "_make_request", return_value={"results": []}
+        ) as mock_request:
+            self.kobo.get_submissions("form-001", fields=["q1", "_uuid"])
+
+        params = mock_request.call_args.kwargs["params"]
+        self.assertEqual(
+            json.loads(params["fields"]), ["_id", "_uuid", "_submission_time", "q1"]
+        )
+
+    @override_settings(KOBO_SYNC_FIELDS={"form-001": ["q1"]})
+    def test_sync_form_uses_configured_projection(self):
+        client = MagicMock()
+        client.get_submission_count.return_value = 0
+        client.iter_submission_pages.return_value = iter([])
+
+        sync_form(client, "form-001")
+
+        self.assertEqual(
+            client.iter_submission_pages.call_args.kwargs["fields"], ["q1"]
+        )
+
+    def test_projected_force_update_keeps_other_answers(self):
+        upsert_submissions(
+            "form-001",
+            [{"_id": 1, "_uuid": "uuid-1", "q1": "old", "q2": "kept"}],
+        )
+        client = MagicMock()
+        client.get_submission_count.return_value = 1
+        client.iter_submission_pages.return_value = iter(
+            [[{"_id": 1, "_uuid": "uuid-1", "q1": "new"}]]
+        )
+
+        stats = sync_form(
+            client, "form-001", full=True, force_update=True, fields=["q1"]
+        )
+
+        self.assertEqual(stats.updated, 1)
+        data = KoboSubmission.objects.get(uuid="uuid-1").data
+        self.assertEqual(data["q1"], "new")
+        self.assertEqual(data["q2"], "kept")
+
+    def test_get_forms_follows_next_links(self):
+        pages = [
+            {
+                "count": 3,
+                "next": "https://kf.kobotoolbox.org/api/v2/assets/?limit=2&offset=2",
+                "results": [{"uid": "a"}, {"uid": "b"}],
+            },
+            {"count": 3, "next": None, "results": [{"uid": "c"}]},
+        ]
+        with patch.object(
+            self.kobo, "_make_request", side_effect=pages
+        ) as mock_request:
+            forms = self.kobo.get_forms(deployed_only=True)
+
+        self.assertEqual([form["uid"] for form in forms], ["a", "b", "c"])
+        first, second = mock_request.call_args_list
+        self.assertEqual(
+            first.kwargs["params"]["q"], "asset_type:survey AND deployment__active:true"
+        )
+        self.assertEqual(second.args[1], pages[0]["next"])
+
+    def test_get_forms_fetches_known_offsets_concurrently(self):
+        def fake_request(method, endpoint, params=None):
+            offset = params["offset"]
+            return {
+                "count": 250,
+                "next": "unused",
+                "results": [
+                    {"uid": f"form-{i}"} for i in range(offset, min(offset + 100, 250))
+                ],
+            }
+
+        with patch.object(self.kobo, "_make_request", side_effect=fake_request):
+            forms = self.kobo.get_forms(concurrency=3)
+
+        self.assertEqual(
+            [form["uid"] for form in forms], [f"form-{i}" for i in range(250)]
+        )
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_form_list_is_cached(self):
+        with patch.object(
+            self.kobo, "get_forms", return_value=[{"uid": "a"}]
+        ) as mock_get_forms:
+            get_cached_forms(self.kobo)
+            forms = get_cached_forms(self.kobo)
+            get_cached_forms(self.kobo, refresh=True)
+
+        self.assertEqual(forms, [{"uid": "a"}])
+        self.assertEqual(mock_get_forms.call_count, 2)
+
+    def test_parallel_fetch_returns_pages_in_order(self):
+        def fake_get_submissions(form_uid, limit, start, query, sort, fields=None):
+            return [{"_id": start + i} for i in range(min(limit, 2500 - start))]
+
+        with patch.object(
+            self.kobo, "get_submission_count", return_value=2500
+        ), patch.object(
+            self.kobo, "get_submissions", side_effect=fake_get_submissions
+        ) as mock_get:
+            submissions = self.kobo.get_all_submissions("form-001", concurrency=3)
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual([s["_id"] for s in submissions], list(range(2500)))
+
+    def test_iter_submission_pages_streams_until_short_page(self):
+        pages = [[{"_id": 1}, {"_id": 2}], [{"_id": 3}]]
+
+        with patch.object(
+            self.kobo, "get_submissions", side_effect=pages
+        ) as mock_get:
+            result = list(self.kobo.iter_submission_pages("form-001", page_size=2))
+
+        self.assertEqual(result, pages)
+        self.assertEqual(mock_get.call_count, 2)
+        # The next page starts after the last _id seen, not at an offset.
+        self.assertEqual(
+            mock_get.call_args_list[1].kwargs["query"], {"_id": {"$gt": 2}}
+        )
+        self.assertNotIn("start", mock_get.call_args_list[1].kwargs)
+
+    def test_parallel_fetch_uses_known_count(self):
+        with patch.object(
+            self.kobo, "get_submission_count"
+        ) as mock_count, patch.object(
+            self.kobo, "get_submissions", return_value=[{"_id": 1}]
+        ):
+            pages = list(
+                self.kobo.iter_submission_pages("form-001", concurrency=2, count=1)
+            )
+
+        self.assertEqual(pages, [[{"_id": 1}]])
+        mock_count.assert_not_called()
+
+
+class SyncJobTests(TestCase):
+    def test_enqueue_reuses_active_job(self):
+        first = enqueue_sync_job("form-001")
+        second = enqueue_sync_job("form-001")
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(SyncJob.objects.count(), 1)
+
+    def test_worker_claims_and_runs_job(self):
+        job = enqueue_sync_job("form-001")
+        kobo = MagicMock()
+        kobo.get_submission_count.return_value = 1
+        kobo.iter_submission_pages.return_value = iter(
+            [[{"_uuid": "uuid-1", "_id": 1, "_submission_time": "2025-10-07T12:00:00"}]]
+        )
+
+        claimed = claim_next_job("test-worker")
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertIsNone(claim_next_job("test-worker"))
+
+        run_sync_job(claimed, client=kobo)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_SUCCEEDED)
+        self.assertEqual(job.total, 1)
+        self.assertEqual(job.created, 1)
+        self.assertTrue(KoboSubmission.objects.filter(uuid="uuid-1").exists())
+
+    def test_job_rewrites_submissions_edited_in_kobo(self):
+        upsert_submissions("form-001", [{"_uuid": "uuid-1", "_id": 1, "answer": "old"}])
+        enqueue_sync_job("form-001", full=True)
+        kobo = MagicMock()
+        kobo.get_submission_count.return_value = 1
+        kobo.iter_submission_pages.return_value = iter(
+            [[{"_uuid": "uuid-1", "_id": 1, "answer": "new"}]]
+        )
+
+        job = run_sync_job(claim_next_job("test-worker"), client=kobo)
+
+        self.assertEqual(job.updated, 1)
+        self.assertEqual(KoboSubmission.objects.get(uuid="uuid-1").data["answer"], "new")
+
+    def test_failed_job_records_error(self):
+        enqueue_sync_job("form-001")
+        job = claim_next_job("test-worker")
+        kobo = MagicMock()
+        kobo.get_submission_count.side_effect = RuntimeError("Kobo is down")
+
+        run_sync_job(job, client=kobo)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_FAILED)
+        self.assertIn("Kobo is down", job.error)
+
+    def test_job_failed_as_stale_is_not_marked_succeeded(self):
+        enqueue_sync_job("form-001")
+        job = claim_next_job("slow-worker")
+        kobo = MagicMock()
+        kobo.iter_submission_pages.return_value = iter([])
+
+        def give_up(form_uid, query=None):
+            SyncJob.objects.filter(pk=job.pk).update(status=SyncJob.STATUS_FAILED)
+            return 0
+
+        kobo.get_submission_count.side_effect = give_up
+
+        run_sync_job(job, client=kobo)
+
+        self.assertEqual(job.status, SyncJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SyncJob.STATUS_FAILED)
+
+    @patch("api.services.kobo_client.time.sleep")
+    def test_retry_waits_send_heartbeats(self, mock_sleep):
+        heartbeats = []
+        kobo = KoboToolboxClient(
+            token="test-token", on_wait=lambda: heartbeats.append(True)
+        )
+        with patch.object(
+            kobo.session,
+            "request",
+            side_effect=[_response(429, headers={"Retry-After": "150"}), _response(200)],
+        ):
+            kobo.get_forms()
+
+        self.assertEqual(len(heartbeats), 3)
+        self.assertEqual(sum(call.args[0] for call in mock_sleep.call_args_list), 150)
+
+    @override_settings(SYNC_JOB_STALE_AFTER=60)
+    def test_stale_running_job_is_failed_and_not_reused(self):
+        stale = enqueue_sync_job("form-001")
+        claim_next_job("dead-worker")
+        SyncJob.objects.filter(pk=stale.pk).update(
+            date_heartbeat=timezone.now() - timedelta(minutes=5)
+        )
+
+        job = enqueue_sync_job("form-001")
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, SyncJob.STATUS_FAILED)
+        self.assertNotEqual(job.pk, stale.pk)
+        self.assertEqual(job.status, SyncJob.STATUS_QUEUED)
+
+
+class SyncJobStatusViewTests(APITestCase):
+    def test_status_endpoint_reports_progress(self):
+        job = SyncJob.objects.create(form_uid="form-001", total=10, processed=4)
+
+        response = self.client.get(reverse("sync-job-status", args=[job.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], SyncJob.STATUS_QUEUED)
+        self.assertEqual(response.data["processed"], 4)
+
+    def test_sync_now_queues_job_without_calling_kobo(self):
+        with patch.dict("os.environ", {"KOBO_FORM_UID": "form-001"}), patch(
+            "api.services.jobs.KoboToolboxClient"
+        ) as mock_client:
+            response = self.client.get(reverse("view-submissions"), {"sync": "true"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_client.assert_not_called()
+        self.assertTrue(
+            SyncJob.objects.filter(
+                form_uid="form-001", status=SyncJob.STATUS_QUEUED
+            ).exists()
+        )
+
+    def test_sync_now_rewrites_submissions_edited_in_kobo(self):
+        upsert_submissions("form-001", [{"_uuid": "uuid-1", "_id": 1, "answer": "orig"}])
+        advance_checkpoint("form-001", SyncStats(last_submission_id=1))
+        with patch.dict("os.environ", {"KOBO_FORM_UID": "form-001"}):
+            self.client.get(reverse("view-submissions"), {"sync": "true"})
+        kobo = MagicMock()
+        kobo.get_submission_count.return_value = 1
+        kobo.iter_submission_pages.return_value = iter(
+            [[{"_uuid": "uuid-1", "_id": 1, "answer": "edited"}]]
+        )
+
+        job = run_sync_job(claim_next_job("test-worker"), client=kobo)
+
+        self.assertIsNone(kobo.get_submission_count.call_args.kwargs["query"])
+        self.assertEqual(job.updated, 1)
+        self.assertEqual(
+            KoboSubmission.objects.get(uuid="uuid-1").data["answer"], "edited"
+        )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        base = timezone.now()
+        for i in range(5):
+            KoboSubmission.objects.create(
+                uuid=f"page-uuid-{i}",
+                form_uid="form-001",
+                data={"question1": i},
+                date_submitted=base - timedelta(minutes=i),
+            )
+
+    def test_pages_forward_and_back(self):
+        queryset = KoboSubmission.objects.all()
+
+        first = keyset_paginate(queryset, 2)
+        self.assertEqual([s.uuid for s in first.items], ["page-uuid-0", "page-uuid-1"])
+        self.assertIsNone(first.previous_cursor)
+
+        second = keyset_paginate(queryset, 2, after=first.next_cursor)
+        self.assertEqual([s.uuid for s in second.items], ["page-uuid-2", "page-uuid-3"])
+
+        back = keyset_paginate(queryset, 2, before=second.previous_cursor)
+        self.assertEqual([s.uuid for s in back.items], ["page-uuid-0", "page-uuid-1"])
+
+        last = keyset_paginate(queryset, 2, after=second.next_cursor)
+        self.assertEqual([s.uuid for s in last.items], ["page-uuid-4"])
+        self.assertIsNone(last.next_cursor)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        page = keyset_paginate(KoboSubmission.objects.all(), 2, after="not-a-cursor")
+        self.assertEqual(page.items[0].uuid, "page-uuid-0")
+
+    def test_submissions_page_is_paginated(self):
+        response = self.client.get(reverse("view-submissions"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["submissions"]), 5)
+        self.assertIsNone(response.context["next_url"])
+
+
+class SearchTextTests(TestCase):
+    def test_search_text_keeps_answers_only(self):
+        text = build_search_text(
+            {
+                "_uuid": "abc-123",
+                "formhub/uuid": "xyz",
+                "meta/instanceID": "uuid:abc",
+                "start": "2025-10-07T12:00:00",
+                "respondent_name": "  Test   USER ",
+                "group/district": "Dhaka North",
+                "crops": ["rice", "jute"],
+            }
+        )
+
+        self.assertEqual(text, "test user dhaka north rice jute")
+
+    def test_webhook_fills_search_text(self):
+        self.client.post(
+            reverse("kobo-webhook"),
+            {"_uuid": "search-uuid", "district": "Sylhet"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(
+            KoboSubmission.objects.get(uuid="search-uuid").search_text, "sylhet"
+        )
+
+
+class DisplayProjectionTests(TestCase):
+    def test_display_fields_drop_metadata(self):
+        display = build_display(
+            {
+                "_uuid": "abc-123",
+                "formhub/uuid": "xyz",
+                "meta/instanceID": "uuid:abc",
+                "__version__": "v1",
+                "start": "2025-10-07T12:00:00",
+                "respondent_name": "Test User",
+                "comments": "",
+                "crops": ["rice", "jute", "wheat", "maize", "potato"],
+                "notes": "one two three four five six seven eight",
+            }
+        )
+
+        self.assertEqual(
+            [field["label"] for field in display["display_fields"]],
+            ["Respondent Name", "Comments", "Crops", "Notes"],
+        )
+        self.assertEqual(
+            display["preview"],
+            [
+                {"label": "Respondent Name", "value": "Test User"},
+                {"label": "Crops", "value": "rice, jute, wheat, maize…"},
+            ],
+        )
+
+    def test_admin_edit_recomputes_derived_fields(self):
+        upsert_submissions(
+            "form-001", [{"_uuid": "admin-1", "_id": 1, "respondent_name": "Before"}]
+        )
+        submission = KoboSubmission.objects.get(uuid="admin-1")
+        submission.data = {"_uuid": "admin-1", "respondent_name": "After"}
+
+        KoboSubmissionAdmin(KoboSubmission, site).save_model(None, submission, None, True)
+
+        submission.refresh_from_db()
+        self.assertEqual(submission.preview, [{"label": "Respondent Name", "value": "After"}])
+        self.assertEqual(submission.search_text, "after")
+        self.assertEqual(
+            list(submission.answers.values_list("value_text", flat=True)), ["After"]
+        )
+
+    def test_submissions_page_reads_preview_only(self):
+        upsert_submissions(
+            "form-001",
+            [{"_uuid": "card-1", "_id": 1, "respondent_name": "Card User"}],
+        )
+
+        response = self.client.get(reverse("view-submissions"))
+
+        self.assertContains(response, "Card User")
+        self.assertIn("data", response.context["submissions"][0].get_deferred_fields())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class SubmissionPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        upsert_submissions(
+            "form-001",
+            [{"_uuid": "cached-1", "_id": 1, "respondent_name": "First Answer"}],
+        )
+        self.submission = KoboSubmission.objects.get(uuid="cached-1")
+
+    def test_list_page_is_cached_until_a_write(self):
+        self.assertContains(self.client.get(reverse("view-submissions")), "First Answer")
+        # QuerySet.update sends no signals, so the cached page is served.
+        KoboSubmission.objects.filter(pk=self.submission.pk).update(
+            preview=[{"label": "Name", "value": "Changed Answer"}]
+        )
+        self.assertContains(self.client.get(reverse("view-submissions")), "First Answer")
+
+        upsert_submissions(
+            "form-001",
+            [{"_uuid": "cached-2", "_id": 2, "respondent_name": "Second Answer"}],
+        )
+
+        response = self.client.get(reverse("view-submissions"))
+        self.assertContains(response, "Second Answer")
+        self.assertContains(response, "Changed Answer")
+
+    def test_webhook_invalidates_form_pages(self):
+        url = reverse("view-submissions")
+        self.client.get(url, {"form_uid": "form-001"})
+
+        self.client.post(
+            reverse("kobo-webhook"),
+            {
+                "_uuid": "cached-3",
+                "_xform_id_string": "form-001",
+                "respondent_name": "Webhook Answer",
+            },
+            content_type="application/json",
+        )
+
+        self.assertContains(self.client.get(url, {"form_uid": "form-001"}), "Webhook Answer")
+
+    def test_detail_fragment_follows_date_updated(self):
+        url = reverse("submission-detail", args=[self.submission.pk])
+        self.assertContains(self.client.get(url), "First Answer")
+        changed = [{"label": "Name", "value": "Changed Answer"}]
+
+        KoboSubmission.objects.filter(pk=self.submission.pk).update(display_fields=changed)
+        self.assertContains(self.client.get(url), "First Answer")
+
+        KoboSubmission.objects.filter(pk=self.submission.pk).update(
+            display_fields=changed, date_updated=timezone.now()
+        )
+        self.assertContains(self.client.get(url), "Changed Answer")
+
+
+class SubmissionAnswerTests(APITestCase):
+    def setUp(self):
+        upsert_submissions(
+            "form-001",
+            [
+                {
+                    "_uuid": "uuid-1",
+                    "_id": 1,
+                    "group_location/district": "Sylhet",
+                    "respondent_age": "34",
+                    "visit_date": "2025-03-01",
+                    "household_members": [
+                        {"household_members/name": "Rahim"},
+                        {"household_members/name": "Karim"},
+                    ],
+                    "meta/instanceID": "uuid:uuid-1",
+                },
+                {
+                    "_uuid": "uuid-2",
+                    "_id": 2,
+                    "group_location/district": "Dhaka",
+                    "respondent_age": "16",
+                },
+            ],
+        )
+        self.url = reverse("kobo-submission-list")
+
+    def _uuids(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(row["uuid"] for row in response.data["results"])
+
+    def test_upsert_writes_typed_answers(self):
+        submission = KoboSubmission.objects.get(uuid="uuid-1")
+        answers = {
+            (answer.field_path, answer.value_text): answer
+            for answer in submission.answers.all()
+        }
+
+        self.assertEqual(answers[("respondent_age", "34")].value_num, 34.0)
+        self.assertEqual(answers[("visit_date", "2025-03-01")].value_date.year, 2025)
+        self.assertIn(("household_members/name", "Karim"), answers)
+        self.assertNotIn("meta/instanceID", {path for path, _ in answers})
+
+    def test_force_update_replaces_answers(self):
+        upsert_submissions(
+            "form-001",
+            [{"_uuid": "uuid-2", "_id": 2, "group_location/district": "Khulna"}],
+            force_update=True,
+        )
+
+        self.assertEqual(
+            list(
+                SubmissionAnswer.objects.filter(submission__uuid="uuid-2").values_list(
+                    "value_text", flat=True
+                )
+            ),
+            ["Khulna"],
+        )
+
+    def test_filters_on_answers(self):
+        response = self.client.get(
+            self.url, {"form_uid": "form-001", "data.group_location/district": "Sylhet"}
+        )
+        self.assertEqual(self._uuids(response), ["uuid-1"])
+
+        response = self.client.get(self.url, {"data.respondent_age__gte": "18"})
+        self.assertEqual(self._uuids(response), ["uuid-1"])
+
+        response = self.client.get(self.url, {"data.household_members/name": "Karim"})
+        self.assertEqual(self._uuids(response), ["uuid-1"])
+
+        response = self.client.get(
+            self.url, {"data.group_location/district__in": "Sylhet,Dhaka"}
+        )
+        self.assertEqual(self._uuids(response), ["uuid-1", "uuid-2"])
+
+    def test_range_filter_rejects_text(self):
+        response = self.client.get(self.url, {"data.respondent_age__gte": "old"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(KOBO_JSON_INDEXES={"form-001": {"respondent_age": "number"}})
+    def test_registered_path_without_column_uses_answers(self):
+        clear_column_cache()
+
+        response = self.client.get(self.url, {"data.respondent_age__lt": "18"})
+
+        self.assertEqual(self._uuids(response), ["uuid-2"])
+
+    def test_submissions_page_applies_answer_filters(self):
+        response = self.client.get(
+            reverse("view-submissions"), {"data.group_location/district": "Dhaka"}
+        )
+
+        self.assertEqual(
+            [submission.uuid for submission in response.context["submissions"]],
+            ["uuid-2"],
+        )
+
+
+class JsonIndexTests(TestCase):
+    @override_settings(JSON_INDEX_COLUMNS_TTL=300)
+    def test_column_cache_expires(self):
+        clear_column_cache()
+        with patch(
+            "api.json_indexes._read_columns", return_value=frozenset()
+        ) as mock_read, patch("api.json_indexes.time.monotonic") as mock_time:
+            mock_time.return_value = 1000.0
+            existing_columns()
+            mock_time.return_value = 1100.0
+            existing_columns()
+            mock_time.return_value = 1400.0
+            existing_columns()
+
+        self.assertEqual(mock_read.call_count, 2)
+        clear_column_cache()
+
+    @override_settings(
+        KOBO_JSON_INDEXES={
+            "form-001": {"group_location/district": "text"},
+            "form-002": {"group_location/district": "number"},
+        }
+    )
+    def test_conflicting_types_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            registered_indexes()
+
+    @override_settings(KOBO_JSON_INDEXES={"form-001": {"age'; DROP TABLE x": "text"}})
+    def test_invalid_path_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            registered_indexes()
+
+    def test_column_and_expression(self):
+        index = JsonIndex("group_location/district", "text")
+
+        self.assertTrue(index.column.startswith("jx_group_location_district_"))
+        self.assertLessEqual(len(index.index_name), 64)
+        self.assertIn("'$.\"group_location/district\"'", index.expression)
+        self.assertIn("CAST(", JsonIndex("respondent_age", "number").expression)
+
+    def test_diff_against_migrated_state(self):
+        indexes = {
+            "district": JsonIndex("district", "text"),
+            "age": JsonIndex("age", "number"),
+        }
+
+        add, drop = diff_indexes({"age": "text", "village": "text"}, indexes)
+
+        self.assertEqual([index.path for index in add], ["age", "district"])
+        self.assertEqual([index.path for index in drop], ["age", "village"])
+
+
+class SubmissionPaginationAPITests(APITestCase):
+    def setUp(self):
+        base = timezone.now()
+        for i in range(3):
+            KoboSubmission.objects.create(
+                uuid=f"api-page-{i}",
+                form_uid="form-001",
+                data={},
+                date_submitted=base - timedelta(minutes=i),
+            )
+        self.url = reverse("kobo-submission-list")
+
+    def test_cursor_pagination_follows_next_link(self):
+        response = self.client.get(self.url, {"page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]],
+            ["api-page-0", "api-page-1"],
+        )
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]], ["api-page-2"]
+        )
+        self.assertIsNone(response.data["next"])
+
+    def test_offset_mode_is_opt_in(self):
+        response = self.client.get(
+            self.url, {"pagination": "offset", "limit": 1, "offset": 1}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(response.data["results"][0]["uuid"], "api-page-1")
+
+
+@override_settings(CHANGES_SETTLE_SECONDS=0)
+class SubmissionChangesFeedTests(APITestCase):
+    def setUp(self):
+        self.url = reverse("kobo-submission-changes")
+        self.watermark = timezone.now()
+        for i in range(3):
+            KoboSubmission.objects.create(
+                uuid=f"change-{i}",
+                form_uid="form-001",
+                data={},
+                date_submitted=timezone.now(),
+            )
+
+    def test_changes_since_watermark_resume_with_cursor(self):
+        response = self.client.get(
+            self.url, {"since": self.watermark.isoformat(), "page_size": 2}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]], ["change-0", "change-1"]
+        )
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(self.url, {"cursor": response.data["next_cursor"]})
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]], ["change-2"]
+        )
+        self.assertFalse(response.data["has_more"])
+
+        # Nothing new: same cursor comes back for the next poll.
+        cursor = response.data["next_cursor"]
+        response = self.client.get(self.url, {"cursor": cursor})
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["next_cursor"], cursor)
+
+    def test_empty_since_poll_keeps_the_bound_exclusive(self):
+        KoboSubmission.objects.filter(uuid="change-0").update(
+            date_updated=self.watermark
+        )
+        KoboSubmission.objects.exclude(uuid="change-0").update(
+            date_updated=self.watermark - timedelta(minutes=1)
+        )
+
+        response = self.client.get(self.url, {"since": self.watermark.isoformat()})
+        self.assertEqual(response.data["results"], [])
+
+        response = self.client.get(self.url, {"cursor": response.data["next_cursor"]})
+        self.assertEqual(response.data["results"], [])
+
+    @override_settings(CHANGES_SETTLE_SECONDS=60)
+    def test_unsettled_writes_are_held_back(self):
+        # change-0 settled long ago; change-1 was stamped earlier than
+        # change-2 but its transaction is still committing.
+        now = timezone.now()
+        KoboSubmission.objects.filter(uuid="change-0").update(
+            date_updated=now - timedelta(minutes=5)
+        )
+        KoboSubmission.objects.filter(uuid="change-1").update(
+            date_updated=now - timedelta(seconds=20)
+        )
+
+        response = self.client.get(
+            self.url, {"since": (now - timedelta(hours=1)).isoformat()}
+        )
+
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]], ["change-0"]
+        )
+        # The cursor stays behind the in-flight row, so it is served later.
+        KoboSubmission.objects.filter(uuid__in=["change-1", "change-2"]).update(
+            date_updated=now - timedelta(minutes=2)
+        )
+        response = self.client.get(self.url, {"cursor": response.data["next_cursor"]})
+        self.assertEqual(
+            [row["uuid"] for row in response.data["results"]], ["change-1", "change-2"]
+        )
+
+    def test_changes_requires_watermark(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SubmissionExportTests(TestCase):
+    def setUp(self):
+        KoboSubmission.objects.create(
+            uuid="export-1",
+            form_uid="form-001",
+            data={"_uuid": "export-1", "name": "Ada", "crops": ["rice", "jute"]},
+            date_submitted=timezone.now(),
+        )
+        KoboSubmission.objects.create(
+            uuid="export-2",
+            form_uid="form-002",
+            data={"name": "Other form"},
+            date_submitted=timezone.now(),
+        )
+
+    def _content(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_streams_one_object_per_line(self):
+        response = self.client.get(
+            reverse("submission-export", args=["ndjson"]), {"form_uid": "form-001"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        lines = self._content(response).splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["uuid"], "export-1")
+
+    def test_csv_export_flattens_answers(self):
+        response = self.client.get(
+            reverse("submission-export", args=["csv"]), {"form_uid": "form-001"}
+        )
+
+        rows = list(csv.reader(io.StringIO(self._content(response))))
+        self.assertEqual(rows[0][-2:], ["name", "crops"])
+        self.assertEqual(rows[1][-2:], ["Ada", "rice jute"])
+        self.assertEqual(len(rows), 2)
+
+    def test_date_only_date_to_includes_the_whole_day(self):
+        KoboSubmission.objects.filter(uuid="export-1").update(
+            date_submitted=timezone.make_aware(datetime(2025, 1, 31, 18, 30))
+        )
+
+        response = self.client.get(
+            reverse("submission-export", args=["ndjson"]),
+            {"date_from": "2025-01-31", "date_to": "2025-01-31"},
+        )
+
+        lines = self._content(response).splitlines()
+        self.assertEqual([json.loads(line)["uuid"] for line in lines], ["export-1"])
+
+    def test_invalid_date_filter_is_rejected(self):
+        response = self.client.get(
+            reverse("submission-export", args=["csv"]), {"date_from": "yesterday"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+SCHEMA_ASSET = {
+    "name": "Household survey",
+    "version_id": "vSchema1",
+    "content": {
+        "survey": [
+            {"type": "start", "name": "start"},
+            {"type": "begin_group", "name": "group_location", "label": ["Location"]},
+            {
+                "type": "select_one",
+                "select_from_list_name": "districts",
+                "name": "district",
+                "label": ["District", "জেলা"],
+            },
+            {"type": "end_group"},
+            {"type": "text", "name": "phone", "label": ["Phone number"]},
+            {"type": "integer", "name": "age", "label": ["Respondent age"]},
+            {"type": "begin_repeat", "name": "members", "label": ["Members"]},
+            {"type": "text", "name": "member_name", "label": ["Name"]},
+            {"type": "end_repeat"},
+            {"type": "note", "name": "thanks", "label": ["Thank you"]},
+        ],
+        "choices": [
+            {"list_name": "districts", "name": "sylhet", "label": ["Sylhet"]},
+            {"list_name": "districts", "name": "dhaka", "label": ["Dhaka"]},
+        ],
+    },
+}
+
+
+class FormSchemaTests(TestCase):
+    def setUp(self):
+        clear_schema_cache()
+        self.addCleanup(clear_schema_cache)
+        save_schema("schema-form", SCHEMA_ASSET)
+
+    def test_parses_paths_labels_and_choices(self):
+        schema = get_schema("schema-form", "vSchema1")
+
+        self.assertEqual(schema.label("group_location/district"), "District")
+        self.assertEqual(schema.choice_label("group_location/district", "dhaka"), "Dhaka")
+        self.assertEqual(schema.questions["members/member_name"].repeat, "members")
+        self.assertEqual(
+            schema.columns, ["start", "group_location/district", "phone", "age", "members"]
+        )
+
+    def test_unknown_version_falls_back_to_latest(self):
+        self.assertEqual(get_schema("schema-form", "vOther").version_id, "vSchema1")
+        self.assertIsNone(get_schema("other-form"))
+
+    def test_answers_are_typed_by_question_type(self):
+        upsert_submissions(
+            "schema-form",
+            [
+                {
+                    "_uuid": "schema-1",
+                    "_id": 1,
+                    "__version__": "vSchema1",
+                    "phone": "01712345678",
+                    "age": "34",
+                }
+            ],
+        )
+
+        answers = {
+            answer.field_path: answer
+            for answer in SubmissionAnswer.objects.filter(submission__uuid="schema-1")
+        }
+        self.assertIsNone(answers["phone"].value_num)
+        self.assertEqual(answers["age"].value_num, 34.0)
+
+    def test_csv_export_uses_schema_columns_and_detail_uses_labels(self):
+        upsert_submissions(
+            "schema-form",
+            [
+                {
+                    "_uuid": "schema-2",
+                    "_id": 2,
+                    "__version__": "vSchema1",
+                    "age": "40",
+                    "group_location/district": "dhaka",
+                }
+            ],
+        )
+        submission = KoboSubmission.objects.get(uuid="schema-2")
+
+        response = self.client.get(
+            reverse("submission-export", args=["csv"]), {"form_uid": "schema-form"}
+        )
+        header = next(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(header[-2:], ["age", "members"])
+
+        response = self.client.get(reverse("submission-detail", args=[submission.pk]))
+        self.assertContains(response, "Respondent age")
+        self.assertEqual(
+            submission.preview,
+            [
+                {"label": "Respondent age", "value": "40"},
+                {"label": "District", "value": "Dhaka"},
+            ],
+        )
+
+
+@override_settings(KOBO_WEBHOOK_MODE="queued")
+class QueuedWebhookTests(APITestCase):
+    def setUp(self):
+        self.url = reverse("kobo-webhook")
+
+    def _post(self, answer):
+        return self.client.post(
+            self.url,
+            {
+                "_uuid": "queued-uuid",
+                "_xform_id_string": "form-001",
+                "survey_response": answer,
+            },
+            format="json",
+        )
+
+    def test_webhook_queues_payload(self):
+        response = self._post("first")
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(WebhookInbox.objects.count(), 1)
+        self.assertFalse(KoboSubmission.objects.exists())
+
+    def test_drain_writes_latest_payload_once(self):
+        self._post("first")
+        self._post("second")
+
+        stats = drain_inbox()
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.skipped, 1)
+        self.assertEqual(WebhookInbox.objects.count(), 0)
+        submission = KoboSubmission.objects.get(uuid="queued-uuid")
+        self.assertEqual(submission.form_uid, "form-001")
+        self.assertEqual(submission.data["survey_response"], "second")
+
+    def test_bad_entry_does_not_block_the_inbox(self):
+        enqueue_webhook("good-uuid", "form-001", {"_uuid": "good-uuid", "q": "a"})
+        enqueue_webhook("bad-uuid", "form-001", {"_uuid": "bad-uuid", "q": "b"})
+
+        def upsert(form_uid, payloads, **kwargs):
+            if any(payload["_uuid"] == "bad-uuid" for payload in payloads):
+                raise ValueError("Incorrect string value")
+            return upsert_submissions(form_uid, payloads, **kwargs)
+
+        with patch("api.services.inbox.upsert_submissions", side_effect=upsert):
+            stats = drain_inbox()
+
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.failed, 1)
+        self.assertTrue(KoboSubmission.objects.filter(uuid="good-uuid").exists())
+        entry = WebhookInbox.objects.get()
+        self.assertEqual(entry.uuid, "bad-uuid")
+        self.assertIn("Incorrect string value", entry.error)
+        # The failed entry is not claimed again.
+        self.assertEqual(drain_inbox().processed, 0)
+
+
+class AsyncViewTests(TestCase):
+    def test_async_health(self):
+        response = self.client.get(reverse("async-health-check"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ok")
+
+    def test_async_webhook_creates_then_updates(self):
+        url = reverse("async-kobo-webhook")
+        payload = {"_uuid": "async-uuid", "_xform_id_string": "form-001", "q": "a"}
+
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["action"], "created")
+
+        payload["q"] = "b"
+        response = self.client.post(url, payload, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["action"], "updated")
+        self.assertEqual(KoboSubmission.objects.get(uuid="async-uuid").data["q"], "b")
+
+    def test_async_webhook_rejects_missing_uuid(self):
+        response = self.client.post(
+            reverse("async-kobo-webhook"), {"formid": "x"}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_list_and_detail(self):
+        submission = KoboSubmission.objects.create(
+            uuid="async-list", form_uid="form-001", data={}, date_submitted=timezone.now()
+        )
+
+        response = self.client.get(reverse("async-submission-list"))
+        self.assertEqual(response.json()["results"][0]["uuid"], "async-list")
+
+        response = self.client.get(
+            reverse("async-submission-detail", args=[submission.pk])
+        )
+        self.assertEqual(response.json()["uuid"], "async-list")
+
+        response = self.client.get(reverse("async-submission-detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class AsyncKoboToolboxClientTests(TestCase):
+    def _client(self, handler):
+        kobo = AsyncKoboToolboxClient(
+            token="test-token",
+            base_url="https://kobo.test",
+            retry_policy=RetryPolicy(max_retries=0),
+        )
+        kobo.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return kobo
+
+    async def test_parallel_pages_come_back_in_order(self):
+        def handler(request):
+            params = request.url.params
+            if params["limit"] == "1":
+                return httpx.Response(200, json={"count": 2500})
+            start = int(params["start"])
+            return httpx.Response(
+                200,
+                json={"results": [{"_id": i} for i in range(start, min(start + 1000, 2500))]},
+            )
+
+        async with self._client(handler) as kobo:
+            submissions = await kobo.get_all_submissions("form-001", concurrency=3)
+
+        self.assertEqual([s["_id"] for s in submissions], list(range(2500)))
+
+    async def test_http_error_raises_kobo_exception(self):
+        async with self._client(lambda request: httpx.Response(502)) as kobo:
+            with self.assertRaises(KoboAPIException):
+                await kobo.get_forms()
+
+
+
+def _response(status_code, json_body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(json_body or {}).encode()
+    response.headers.update(headers or {})
+    return response
+
+
+@patch("api.services.kobo_client.time.sleep")
+class KoboClientResilienceTests(TestCase):
+    def test_retries_transient_errors_then_succeeds(self, mock_sleep):
+        kobo = KoboToolboxClient(token="test-token")
+        with patch.object(
+            kobo.session,
+            "request",
+            side_effect=[
+                requests.exceptions.ConnectionError("reset"),
+                _response(502),
+                _response(200, {"results": [{"_id": 1}]}),
+            ],
+        ) as mock_request:
+            forms = kobo.get_forms()
+
+        self.assertEqual(forms, [{"_id": 1}])
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_honours_retry_after(self, mock_sleep):
+        kobo = KoboToolboxClient(token="test-token")
+        with patch.object(
+            kobo.session,
+            "request",
+            side_effect=[_response(429, headers={"Retry-After": "7"}), _response(200)],
+        ):
+            kobo.get_forms()
+
+        mock_sleep.assert_called_once_with(7.0)
+
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        kobo = KoboToolboxClient(
+            token="test-token", retry_policy=RetryPolicy(max_retries=2)
+        )
+        with patch.object(kobo.session, "request", return_value=_response(503)):
+            with self.assertRaises(KoboAPIException):
+                kobo.get_forms()
+
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_open_circuit_fails_fast(self, mock_sleep):
+        kobo = KoboToolboxClient(
+            token="test-token",
+            retry_policy=RetryPolicy(max_retries=0),
+            circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+        with patch.object(
+            kobo.session, "request", return_value=_response(500)
+        ) as mock_request:
+            for _ in range(2):
+                with self.assertRaises(KoboAPIException):
+                    kobo.get_forms()
+            with self.assertRaises(KoboCircuitOpenError):
+                kobo.get_forms()
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_retries_of_one_request_do_not_open_the_circuit(self, mock_sleep):
+        kobo = KoboToolboxClient(
+            token="test-token",
+            retry_policy=RetryPolicy(max_retries=5),
+            circuit_breaker=CircuitBreaker(failure_threshold=5, reset_timeout=60),
+        )
+        with patch.object(
+            kobo.session,
+            "request",
+            side_effect=[_response(503)] * 5 + [_response(200, {"results": []})],
+        ) as mock_request:
+            kobo.get_forms()
+
+        self.assertEqual(mock_request.call_count, 6)
+        self.assertEqual(kobo.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+
+class TokenBucketTests(TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertGreater(bucket.reserve(), 0.0)
+
+
+class FastJSONTests(TestCase):
+    def test_renderer_matches_stock_renderer(self):
+        data = {
+            "name": "Ménage № 4",
+            "when": datetime(2025, 10, 7, 12, 0, tzinfo=dt_timezone.utc),
+            "amount": Decimal("1.5"),
+            "answers": [{"q": "a b"}],
+        }
+
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_parser_decodes_body(self):
+        parsed = FastJSONParser().parse(io.BytesIO(b'{"_uuid": "u-1", "n": [1, 2]}'))
+
+        self.assertEqual(parsed, {"_uuid": "u-1", "n": [1, 2]})
+
+    def test_parser_rejects_invalid_json(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{not json"))
@@ -1,11 +1,18 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    AsyncHealthCheckView,
+    AsyncKoboWebhookView,
+    AsyncSubmissionDetailView,
+    AsyncSubmissionListView,
     HealthCheckView,
     KoboSubmissionViewSet,
     KoboWebhookView,
     ProjectMetadataView,
+    SyncJobStatusView,
+    export_submissions_view,
     home_view,
     submission_detail_view,
     submit_survey_view,
@@ -20,7 +27,35 @@ urlpatterns = [
     path("health/", HealthCheckView.as_view(), name="health-check"),
     path("meta/", ProjectMetadataView.as_view(), name="project-metadata"),
     path("kobo/webhook/", KoboWebhookView.as_view(), name="kobo-webhook"),
+    path(
+        "api/sync-jobs/<int:pk>/",
+        SyncJobStatusView.as_view(),
+        name="sync-job-status",
+    ),
+    # Must precede the router, whose detail route would read "export" as a pk
+    re_path(
+        r"^api/submissions/export\.(?P<fmt>ndjson|csv)$",
+        export_submissions_view,
+        name="submission-export",
+    ),
     path("api/", include(router.urls)),
+    # Async API endpoints (for ASGI deployments)
+    path("async/health/", AsyncHealthCheckView.as_view(), name="async-health-check"),
+    path(
+        "async/kobo/webhook/",
+        csrf_exempt(AsyncKoboWebhookView.as_view()),
+        name="async-kobo-webhook",
+    ),
+    path(
+        "async/api/submissions/",
+        AsyncSubmissionListView.as_view(),
+        name="async-submission-list",
+    ),
+    path(
+        "async/api/submissions/<int:pk>/",
+        AsyncSubmissionDetailView.as_view(),
+        name="async-submission-detail",
+    ),
     # Web interface
     path("", home_view, name="home"),
     path("submit/", submit_survey_view, name="submit-survey"),
@@ -1,22 +1,47 @@
 import os
-from datetime import datetime, timezone as _dt_timezone
-from zoneinfo import ZoneInfo
+from datetime import datetime, time, timedelta
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.views import View
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import KoboSubmission
+from . import fastjson
+from .exports import export_fields, iter_csv, iter_ndjson
+from .filters import AnswerFilterBackend, answer_filter_params, apply_answer_filters
+from .models import KoboSubmission, SyncJob
+from .page_cache import cache_ttl, list_page_key
+from .pagination import (
+    SubmissionPagination,
+    akeyset_paginate,
+    approximate_count,
+    decode_key,
+    encode_cursor,
+    keyset_paginate,
+)
+from .search import search_submissions
 from .serializers import (
     HealthCheckSerializer,
     KoboSubmissionSerializer,
     ProjectMetadataSerializer,
+    SyncJobSerializer,
 )
-from .services import KoboToolboxClient
+from .services import asave_submission, save_submission
+from .services.inbox import aenqueue_webhook, enqueue_webhook
+from .services.jobs import enqueue_sync_job
 
 
 class HealthCheckView(APIView):
@@ -57,6 +82,9 @@ class KoboWebhookView(APIView):
     - REST Services → Add new endpoint
     - URL: https://yourdomain.com/api/kobo/webhook/
     - Method: POST
+
+    With KOBO_WEBHOOK_MODE=queued the payload is only appended to the
+    webhook inbox and the view answers 202 Accepted.
     """
 
     authentication_classes: list = []
@@ -77,60 +105,247 @@ class KoboWebhookView(APIView):
         # Get form UID (may come from different fields depending on Kobo setup)
         form_uid = payload.get("_xform_id_string") or payload.get("formid") or "unknown"
 
-        # Parse submission timestamp
-        submission_time_str = payload.get("_submission_time")
-        if submission_time_str:
-            try:
-                # Parse ISO timestamp (Kobo returns Z for UTC)
-                dt = datetime.fromisoformat(submission_time_str.replace("Z", "+00:00"))
-                # Ensure it's timezone-aware (assume UTC if naive)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=_dt_timezone.utc)
-                # Convert to Asia/Dhaka explicitly
-                dhaka_tz = ZoneInfo("Asia/Dhaka")
-                date_submitted = dt.astimezone(dhaka_tz)
-            except (ValueError, AttributeError):
-                date_submitted = timezone.now()
-        else:
-            date_submitted = timezone.now()
-
-        # Create or update submission
-        obj, created = KoboSubmission.objects.update_or_create(
-            uuid=uuid,
-            defaults={
-                "form_uid": form_uid,
-                "data": payload,
-                "date_submitted": date_submitted,
-            },
-        )
+        if settings.KOBO_WEBHOOK_MODE == "queued":
+            # Written later in batches by the drain_webhook_inbox command
+            enqueue_webhook(uuid, form_uid, payload)
+            return Response(
+                {"status": "queued", "uuid": uuid},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # Create or update submission (no write when the content is unchanged)
+        action = save_submission(form_uid, payload)
 
         return Response(
             {
                 "status": "ok",
-                "action": "created" if created else "updated",
+                "action": action,
                 "uuid": uuid,
             },
-            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            status=status.HTTP_201_CREATED if action == "created" else status.HTTP_200_OK,
         )
 
 
+class SyncJobStatusView(APIView):
+    """Report progress of a background sync job (polled by "Sync Now")."""
+
+    authentication_classes: list = []
+    permission_classes: list = []
+
+    def get(self, request, pk):
+        job = get_object_or_404(SyncJob, pk=pk)
+        return Response(SyncJobSerializer(job).data)
+
+
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# BigAutoField's upper bound: a cursor on (timestamp, MAX_ID) resumes
+# strictly after the timestamp, as no row sorts after it there.
+MAX_ID = 2**63 - 1
+
+
+def _page_size_param(params):
+    """Bounded ?page_size= for endpoints that paginate by hand."""
+    try:
+        page_size = int(params.get("page_size", API_PAGE_SIZE))
+    except ValueError:
+        page_size = API_PAGE_SIZE
+    return max(1, min(page_size, API_MAX_PAGE_SIZE))
+
+
 class KoboSubmissionViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint to browse synced KoboToolbox submissions.
 
     Provides list and detail views (read-only).
     Filter by form_uid using ?form_uid=xxx
+    Search answers using ?search=keyword
+    Filter on answers using ?data.<question>=value (see api/filters.py)
+    Paginated by cursor (?cursor=, ?page_size=); ?pagination=offset switches
+    to ?limit=&offset= pages.
     """
 
     queryset = KoboSubmission.objects.all()
     serializer_class = KoboSubmissionSerializer
+    pagination_class = SubmissionPagination
+    filter_backends = [OrderingFilter, DjangoFilterBackend, AnswerFilterBackend]
     filterset_fields = ["form_uid"]
     ordering_fields = ["date_submitted", "date_synced"]
-    ordering = ["-date_submitted"]
+    # id breaks ties so cursor positions are unique.
+    ordering = ["-date_submitted", "-id"]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search_query = self.request.query_params.get("search")
+        if search_query:
+            queryset = search_submissions(queryset, search_query)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        """
+        Submissions created or updated after a watermark, oldest change first.
+
+        Start with ?since=<ISO timestamp>, then pass the returned
+        ``next_cursor`` as ?cursor= to resume exactly after the last row
+        seen. ``next_cursor`` is returned even on an empty page so consumers
+        can poll with it. Optional: ?form_uid=, ?page_size= (max 1000).
+
+        Rows are stamped before their transaction commits, so a row can
+        become visible after later-stamped ones. Only rows older than
+        CHANGES_SETTLE_SECONDS are served, so the cursor never moves past
+        a write still in flight.
+        """
+        settle = timedelta(seconds=getattr(settings, "CHANGES_SETTLE_SECONDS", 30))
+        queryset = KoboSubmission.objects.filter(
+            date_updated__lt=timezone.now() - settle
+        )
+        form_uid = request.query_params.get("form_uid")
+        if form_uid:
+            queryset = queryset.filter(form_uid=form_uid)
+
+        cursor_param = request.query_params.get("cursor")
+        since_param = request.query_params.get("since")
+        if cursor_param:
+            position = decode_key(cursor_param)
+            if position is None:
+                return Response(
+                    {"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST
+                )
+            after, after_id = position
+            queryset = queryset.filter(
+                Q(date_updated__gt=after) | Q(date_updated=after, id__gt=after_id)
+            )
+        elif since_param:
+            after = parse_datetime(since_param)
+            if after is None:
+                return Response(
+                    {"error": "since must be an ISO 8601 timestamp"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(after):
+                after = timezone.make_aware(after)
+            queryset = queryset.filter(date_updated__gt=after)
+        else:
+            return Response(
+                {"error": "Provide since=<timestamp> or cursor=<token>"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        page_size = _page_size_param(request.query_params)
+
+        rows = list(queryset.order_by("date_updated", "id")[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if rows:
+            next_cursor = encode_cursor([rows[-1].date_updated, rows[-1].pk])
+        elif cursor_param:
+            next_cursor = cursor_param
+        else:
+            # Nothing newer yet: resume after the watermark, still exclusive.
+            next_cursor = encode_cursor([after, MAX_ID])
+
+        return Response(
+            {
+                "results": self.get_serializer(rows, many=True).data,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            }
+        )
+
+
+# Native async views, for ASGI deployments (see README "ASGI deployment").
+# They mirror the DRF views above without holding a thread per request.
+
+
+class AsyncHealthCheckView(View):
+    """Async counterpart of HealthCheckView."""
+
+    async def get(self, request):
+        serializer = HealthCheckSerializer(
+            {"status": "ok", "timestamp": timezone.now()}
+        )
+        return JsonResponse(serializer.data)
+
+
+class AsyncKoboWebhookView(View):
+    """Async counterpart of KoboWebhookView (same payloads and responses)."""
+
+    async def post(self, request):
+        try:
+            payload = fastjson.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON payload"}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({"error": "Invalid JSON payload"}, status=400)
+
+        uuid = payload.get("_uuid")
+        if not uuid:
+            return JsonResponse({"error": "Missing _uuid in payload"}, status=400)
+
+        form_uid = payload.get("_xform_id_string") or payload.get("formid") or "unknown"
+
+        if settings.KOBO_WEBHOOK_MODE == "queued":
+            await aenqueue_webhook(uuid, form_uid, payload)
+            return JsonResponse({"status": "queued", "uuid": uuid}, status=202)
+
+        action = await asave_submission(form_uid, payload)
+        return JsonResponse(
+            {
+                "status": "ok",
+                "action": action,
+                "uuid": uuid,
+            },
+            status=201 if action == "created" else 200,
+        )
+
+
+class AsyncSubmissionListView(View):
+    """
+    Async submission list, newest first.
+
+    Query params: ?form_uid=, ?page_size= (max 1000), and ?cursor= taken
+    from the previous response's ``next`` value.
+    """
+
+    async def get(self, request):
+        queryset = KoboSubmission.objects.all()
+        form_uid = request.GET.get("form_uid")
+        if form_uid:
+            queryset = queryset.filter(form_uid=form_uid)
+
+        page_size = _page_size_param(request.GET)
+
+        page = await akeyset_paginate(
+            queryset, page_size, after=request.GET.get("cursor")
+        )
+        return JsonResponse(
+            {
+                "results": KoboSubmissionSerializer(page.items, many=True).data,
+                "next": page.next_cursor,
+            }
+        )
+
+
+class AsyncSubmissionDetailView(View):
+    """Async counterpart of the submission detail API."""
+
+    async def get(self, request, pk):
+        try:
+            submission = await KoboSubmission.objects.aget(pk=pk)
+        except KoboSubmission.DoesNotExist:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        return JsonResponse(KoboSubmissionSerializer(submission).data)
 
 
 # Template-based views for web interface
 
+SUBMISSIONS_PAGE_SIZE = 24
+
+SUBMISSION_CARD_FIELDS = ("id", "preview", "date_submitted", "date_synced")
+
 
 def home_view(request):
     """Home page with app overview."""
@@ -144,89 +359,153 @@ def submit_survey_view(request):
 
 
 def view_submissions_view(request):
-    """List all submissions with search and auto-sync."""
-    # Auto-sync if requested
+    """
+    List all submissions with search; "Sync Now" queues a background sync.
+
+    Rendered pages are cached until a write to their form (see page_cache.py).
+    Requests that queue a sync or carry messages are always rendered.
+    """
+    if request.GET.get("sync") == "true" or len(messages.get_messages(request)):
+        return _render_submissions_page(request)
+
+    key = list_page_key(request.GET)
+    content = cache.get(key)
+    if content is not None:
+        return HttpResponse(content)
+    response = _render_submissions_page(request)
+    # An invalid filter adds a warning; don't serve it to the next visitor.
+    if not len(messages.get_messages(request)):
+        cache.set(key, response.content, cache_ttl())
+    return response
+
+
+def _render_submissions_page(request):
     sync_message = None
     sync_status = None
+    sync_job = None
     if request.GET.get("sync") == "true":
         form_uid = os.getenv("KOBO_FORM_UID")
         if not form_uid:
             sync_message = "KOBO_FORM_UID not configured in .env file"
             sync_status = "error"
         else:
-            try:
-                client = KoboToolboxClient()
-                submissions = client.get_submissions(form_uid)
-
-                created_count = 0
-                updated_count = 0
-                total_fetched = len(submissions) if submissions else 0
-
-                for sub in submissions:
-                    uuid = sub.get("_uuid")
-                    if not uuid:
-                        continue
-
-                    submission_time_str = sub.get("_submission_time")
-                    if submission_time_str:
-                        try:
-                            dt = datetime.fromisoformat(
-                                submission_time_str.replace("Z", "+00:00")
-                            )
-                            if dt.tzinfo is None:
-                                dt = dt.replace(tzinfo=_dt_timezone.utc)
-                            dhaka_tz = ZoneInfo("Asia/Dhaka")
-                            date_submitted = dt.astimezone(dhaka_tz)
-                        except (ValueError, AttributeError):
-                            date_submitted = timezone.now()
-                    else:
-                        date_submitted = timezone.now()
-
-                    _, created = KoboSubmission.objects.update_or_create(
-                        uuid=uuid,
-                        defaults={
-                            "form_uid": form_uid,
-                            "data": sub,
-                            "date_submitted": date_submitted,
-                        },
-                    )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-
-                sync_message = f"✓ Synced {total_fetched} submissions from KoboToolbox. Created: {created_count}, Updated: {updated_count}"
-                sync_status = "success"
-            except Exception as e:
-                import traceback
-
-                error_detail = traceback.format_exc()
-                print(f"Sync error: {error_detail}")  # Log to console
-                sync_message = f"Sync failed: {str(e)}"
-                sync_status = "error"
+            # Full, like the original in-request sync: submissions edited in
+            # Kobo sit behind the checkpoint. Unchanged ones cost no write.
+            sync_job = enqueue_sync_job(form_uid, full=True)
+            sync_message = "Sync queued, waiting for a sync worker..."
+            sync_status = "info"
 
     # Get submissions with search
     search_query = request.GET.get("search", "")
-    submissions = KoboSubmission.objects.all().order_by("-date_submitted")
+    # The cards only need the precomputed preview and timestamps, not data.
+    submissions = KoboSubmission.objects.only(*SUBMISSION_CARD_FIELDS)
 
     if search_query:
-        submissions = submissions.filter(
-            data__icontains=search_query
-        ) | submissions.filter(uuid__icontains=search_query)
+        submissions = search_submissions(submissions, search_query)
+
+    # ?data.<path>= answer filters, as in the API
+    answer_filters = answer_filter_params(request.GET)
+    form_uid = request.GET.get("form_uid", "")
+    if form_uid:
+        submissions = submissions.filter(form_uid=form_uid)
+    try:
+        submissions = apply_answer_filters(submissions, answer_filters, form_uid)
+    except ValidationError as exc:
+        messages.warning(request, f"Ignored invalid answer filter: {exc.detail}")
+        answer_filters = {}
+
+    page = keyset_paginate(
+        submissions,
+        SUBMISSIONS_PAGE_SIZE,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
+    total_count, total_is_estimate = approximate_count(submissions)
+
+    def page_url(**cursor):
+        params = {"search": search_query} if search_query else {}
+        if form_uid:
+            params["form_uid"] = form_uid
+        params.update(answer_filters)
+        params.update(cursor)
+        return "?" + urlencode(params)
 
     return render(
         request,
         "api/view_submissions.html",
         {
-            "submissions": submissions,
+            "submissions": page.items,
+            "total_count": total_count,
+            "total_is_estimate": total_is_estimate,
+            "next_url": page_url(after=page.next_cursor) if page.next_cursor else None,
+            "previous_url": (
+                page_url(before=page.previous_cursor) if page.previous_cursor else None
+            ),
             "sync_message": sync_message,
             "sync_status": sync_status,
+            "sync_job": sync_job,
             "search_query": search_query,
         },
     )
 
 
+def export_submissions_view(request, fmt):
+    """
+    Stream submissions as NDJSON or CSV.
+
+    Filters: ?form_uid=, ?date_from= and ?date_to= (on date_submitted,
+    ISO 8601). A date-only date_to includes that whole day. CSV flattens
+    answers into one column per question.
+    """
+    queryset = KoboSubmission.objects.only(
+        "id", "uuid", "form_uid", "data", "date_submitted", "date_updated"
+    )
+    form_uid = request.GET.get("form_uid")
+    if form_uid:
+        queryset = queryset.filter(form_uid=form_uid)
+    for param, lookup in (("date_from", "gte"), ("date_to", "lte")):
+        value = request.GET.get(param)
+        if not value:
+            continue
+        day = parse_date(value)
+        if day is not None:
+            parsed = datetime.combine(day, time.min)
+            if param == "date_to":
+                # Up to, not including, midnight after the given day.
+                parsed, lookup = parsed + timedelta(days=1), "lt"
+        else:
+            parsed = parse_datetime(value)
+        if parsed is None:
+            return JsonResponse(
+                {"error": f"{param} must be an ISO 8601 date or timestamp"},
+                status=400,
+            )
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        queryset = queryset.filter(**{f"date_submitted__{lookup}": parsed})
+
+    filename = f"submissions-{form_uid or 'all'}.{fmt}"
+    if fmt == "csv":
+        fields = export_fields(form_uid, queryset)
+        response = StreamingHttpResponse(
+            iter_csv(queryset, fields), content_type="text/csv; charset=utf-8"
+        )
+    else:
+        response = StreamingHttpResponse(
+            iter_ndjson(queryset), content_type="application/x-ndjson"
+        )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 def submission_detail_view(request, pk):
     """Detail view for a single submission."""
-    submission = get_object_or_404(KoboSubmission, pk=pk)
-    return render(request, "api/submission_detail.html", {"submission": submission})
+    # display_fields is only loaded when the cached fragment is missing.
+    submission = get_object_or_404(
+        KoboSubmission.objects.only("id", "date_submitted", "date_updated"), pk=pk
+    )
+    return render(
+        request,
+        "api/submission_detail.html",
+        {"submission": submission, "cache_ttl": cache_ttl()},
+    )
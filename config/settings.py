@@ -139,10 +139,11 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 REST_FRAMEWORK = {
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        # orjson-backed when installed, stdlib json otherwise (api/fastjson.py)
+        "api.fastjson.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "api.fastjson.FastJSONParser",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -152,8 +153,64 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.SubmissionPagination",
+    "PAGE_SIZE": 100,
 }
 
+# "sync" writes webhook submissions during the request; "queued" appends them
+# to an inbox drained by `manage.py drain_webhook_inbox` and answers 202.
+KOBO_WEBHOOK_MODE = os.environ.get("KOBO_WEBHOOK_MODE", "sync").lower()
+
+# Answer columns for CSV exports, per form UID, e.g.
+# {"dxT6aOXp": ["respondent_name", "group_location/district"]}.
+# Forms not listed use the answer keys of their first rows.
+KOBO_EXPORT_FIELDS = {}
+
+# Fields fetched from Kobo by fetch_kobo_data, per form UID, e.g.
+# {"dxT6aOXp": ["respondent_name", "group_location/district"]}.
+# _id, _uuid and _submission_time are always fetched; forms not listed
+# (and runs without --fields) fetch every field.
+KOBO_SYNC_FIELDS = {}
+
+# Seconds a change must age before the changes feed serves it. Must exceed
+# the longest submission write transaction (one sync page), or rows
+# committed late could be skipped by consumers.
+CHANGES_SETTLE_SECONDS = int(os.environ.get("CHANGES_SETTLE_SECONDS", "30"))
+
+# Seconds a running sync job may go without a progress heartbeat before it
+# is considered abandoned (its worker died) and marked failed.
+SYNC_JOB_STALE_AFTER = int(os.environ.get("SYNC_JOB_STALE_AFTER", "900"))
+
+# Answer paths with a generated, indexed column (MySQL), per form UID, e.g.
+# {"dxT6aOXp": {"group_location/district": "text", "respondent_age": "number"}}.
+# Run `manage.py make_json_index_migration` and `migrate` after changing it.
+KOBO_JSON_INDEXES = {}
+
+# Seconds each process caches which generated columns exist, so processes
+# other than the one running `migrate` see new columns within this delay.
+JSON_INDEX_COLUMNS_TTL = int(os.environ.get("JSON_INDEX_COLUMNS_TTL", "300"))
+
+# File-based by default so that management commands, which each run in a new
+# process, share cached data such as the Kobo asset list. DJANGO_CACHE_BACKEND
+# swaps in another backend (e.g. Redis or Memcached, with DJANGO_CACHE_DIR
+# as its location).
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "DJANGO_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.environ.get("DJANGO_CACHE_DIR", str(BASE_DIR / ".cache")),
+    }
+}
+
+# Seconds the Kobo asset list is cached (list_kobo_forms, fetch_kobo_data --all-forms).
+KOBO_FORMS_CACHE_TTL = int(os.environ.get("KOBO_FORMS_CACHE_TTL", "900"))
+
+# Seconds rendered submission pages and detail fragments are kept. Writes
+# invalidate them sooner (see api/page_cache.py).
+SUBMISSION_CACHE_TTL = int(os.environ.get("SUBMISSION_CACHE_TTL", "3600"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 